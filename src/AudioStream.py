@@ -0,0 +1,185 @@
+import math
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from SilenceDetector import EnergyAccumulator, assemble_envelope, finish_envelope_file
+
+
+class AudioStream:
+    """Lê o áudio decodificado pelo ffmpeg direto de um pipe, em blocos de tamanho fixo.
+
+    O áudio sai mono, int16 e em uma taxa baixa, suficiente para análise de volume; nenhum
+    arquivo intermediário é criado e a memória usada não depende da duração do vídeo.
+    """
+
+    SAMPLE_RATE = 16000
+    CHUNK_FRAMES = 1 << 16
+    # 🔹 Segundos lidos antes de cada bloco da análise em paralelo e descartados: o
+    # decodificador (sobreposição da MDCT do AAC) e o resampler começam frios após o -ss
+    PREROLL_SECONDS = 1
+
+    def __init__(
+        self, video_path, sample_rate=SAMPLE_RATE, chunk_frames=CHUNK_FRAMES, start=None, duration=None
+    ):
+        self.video_path = video_path
+        self.sample_rate = sample_rate
+        self.chunk_frames = chunk_frames
+        # Leitura de um intervalo (s) do áudio, usada pela análise em paralelo
+        self.start = start
+        self.duration = duration
+
+    def command(self):
+        """Linha de comando do ffmpeg que escreve PCM s16le mono no stdout"""
+        seek = ["-ss", str(self.start)] if self.start else []
+        limit = ["-t", str(self.duration)] if self.duration else []
+        return [
+            "ffmpeg",
+            "-hide_banner",
+            "-v", "error",
+            *seek,
+            "-i", self.video_path,
+            *limit,
+            "-vn",
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ac", "1",
+            "-ar", str(self.sample_rate),
+            "pipe:1",
+        ]
+
+    def chunks(self):
+        """Gera blocos int16 de até `chunk_frames` amostras enquanto o ffmpeg decodifica"""
+        process = subprocess.Popen(
+            self.command(), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        chunk_bytes = self.chunk_frames * 2
+        leftover = b""
+        try:
+            while True:
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                data = leftover + data
+                usable = len(data) - len(data) % 2
+                leftover = data[usable:]
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype=np.int16)
+
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg falhou ao extrair o áudio: {stderr.strip()}")
+        finally:
+            # 🔹 Se o consumidor parar antes do fim, o ffmpeg não fica órfão
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    def analyze(self, *consumers):
+        """Passa cada bloco por todos os consumidores (objetos com `feed`) em uma só leitura"""
+        for chunk in self.chunks():
+            for consumer in consumers:
+                consumer.feed(chunk)
+
+    def envelope(self, sink=None):
+        """Energia por milissegundo do áudio inteiro, calculada em memória limitada.
+
+        Com `sink` (arquivo binário) a energia vai para o disco e o envelope volta mapeado.
+        """
+        accumulator = EnergyAccumulator(self.sample_rate, channels=1, sink=sink)
+        self.analyze(accumulator)
+        return accumulator.finish()
+
+    def envelope_parallel(
+        self, total_duration, workers, chunk_seconds=300, preroll=PREROLL_SECONDS, sink=None
+    ):
+        """Envelope calculado por vários processos, cada um lendo um intervalo com -ss/-t.
+
+        Os intervalos começam em segundos inteiros, então os limites de ms de cada bloco
+        coincidem com os da leitura única. Cada bloco (menos o primeiro) é lido a partir de
+        `preroll` s antes e essas amostras de aquecimento são descartadas, para que as
+        amostras analisadas sejam as mesmas da leitura única; só o último bloco lê até o
+        fim do arquivo. Se algum bloco vier incompleto (duração estimada errada, seek
+        impreciso), volta para a leitura única.
+
+        Com `sink` cada bloco é gravado no arquivo assim que chega, em ordem, e no máximo
+        dois blocos por worker ficam em andamento: a memória não cresce com a duração.
+        """
+        chunk_seconds = max(1, int(chunk_seconds))
+        starts = list(range(0, max(1, math.ceil(total_duration)), chunk_seconds))
+        # 🔹 Com taxa múltipla de 1000 cada ms tem um número inteiro de amostras
+        if workers <= 1 or len(starts) <= 1 or self.sample_rate % 1000:
+            return self.envelope(sink)
+
+        tasks = iter(
+            (self.video_path, self.sample_rate, start, chunk_seconds, idx == len(starts) - 1, preroll)
+            for idx, start in enumerate(starts)
+        )
+        expected = chunk_seconds * self.sample_rate
+        parts = []
+        written = 0
+        n_frames = 0
+        complete = True
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = deque(pool.submit(_range_energy, *task) for task in islice(tasks, 2 * workers))
+            while futures:
+                energy, pending, frames = futures.popleft().result()
+                futures.extend(pool.submit(_range_energy, *task) for task in islice(tasks, 1))
+                if futures and frames != expected:
+                    complete = False
+                    for future in futures:
+                        future.cancel()
+                    break
+                n_frames += frames
+                if sink is None:
+                    parts.append(energy)
+                else:
+                    sink.write(energy.tobytes())
+                    written += len(energy)
+
+        if not complete:
+            print("⚠️ Leitura em blocos incompleta, refazendo a análise em uma passada.")
+            if sink is not None:
+                sink.seek(0)
+                sink.truncate()
+            return self.envelope(sink)
+
+        if sink is None:
+            return assemble_envelope(parts, pending, self.sample_rate, 1, n_frames)
+        return finish_envelope_file(sink, written, pending, energy.dtype, self.sample_rate, 1, n_frames)
+
+
+def _range_energy(video_path, sample_rate, start, seconds, last, preroll=AudioStream.PREROLL_SECONDS):
+    """Energia por ms de um intervalo do áudio (executado em um processo do pool)"""
+    preroll = min(preroll, start)
+    skip = int(preroll * sample_rate)  # Amostras de aquecimento, fora da análise
+    expected = None if last else seconds * sample_rate
+    # 🔹 Lê um pouco além do bloco e corta no número exato de amostras esperado
+    stream = AudioStream(
+        video_path,
+        sample_rate,
+        start=start - preroll,
+        duration=None if last else preroll + seconds + 1,
+    )
+    accumulator = EnergyAccumulator(sample_rate, channels=1)
+    chunks = stream.chunks()
+    try:
+        for chunk in chunks:
+            if skip:
+                dropped = min(skip, len(chunk))
+                chunk = chunk[dropped:]
+                skip -= dropped
+                if not len(chunk):
+                    continue
+            if expected is not None:
+                chunk = chunk[: expected - accumulator.frames_seen]
+            accumulator.feed(chunk)
+            if expected is not None and accumulator.frames_seen >= expected:
+                break
+    finally:
+        chunks.close()
+    return accumulator.closed_energy, accumulator.pending_energy, accumulator.frames_seen
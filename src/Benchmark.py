@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from AudioStream import AudioStream
+from Calibration import Calibration
+from EncoderRegistry import EncoderSession
+from ProcessadorVideo import ProcessadorVideo
+
+# 🔹 Padrão de áudio conhecido: SPEECH_LEN s de tom seguidos de SILENCE_LEN s de silêncio
+SPEECH_LEN = 4.0
+SILENCE_LEN = 1.5
+
+
+def generate_media(path, duration, resolution, fps=30):
+    """Gera um vídeo determinístico (testsrc2 + tom intermitente) com libx264"""
+    period = SPEECH_LEN + SILENCE_LEN
+    audio_expr = f"0.5*sin(2*PI*440*t)*lt(mod(t\\,{period})\\,{SPEECH_LEN})"
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size={resolution}:rate={fps}:duration={duration}",
+            "-f", "lavfi", "-i", f"aevalsrc={audio_expr}:s=48000:d={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 2),
+            "-c:a", "aac", "-shortest",
+            path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def generate_long_audio(path, hours):
+    """Gera só o áudio do padrão sintético, comprimido, para a checagem de memória"""
+    duration = int(hours * 3600)
+    period = SPEECH_LEN + SILENCE_LEN
+    audio_expr = f"0.5*sin(2*PI*440*t)*lt(mod(t\\,{period})\\,{SPEECH_LEN})"
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"aevalsrc={audio_expr}:s=16000:d={duration}",
+            "-c:a", "aac", "-b:a", "32k", "-ac", "1",
+            path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def expected_silences(duration, min_silence_len):
+    """Quantidade de silêncios do padrão sintético que a detecção deve encontrar"""
+    if SILENCE_LEN * 1000 < min_silence_len:
+        return 0
+    count = 0
+    start = SPEECH_LEN
+    while start + min_silence_len / 1000 <= duration:
+        count += 1
+        start += SPEECH_LEN + SILENCE_LEN
+    return count
+
+
+def peak_rss_mb():
+    """Pico de memória residente deste processo e do maior filho (ffmpeg), em MB.
+
+    É o máximo desde o início do processo, não de uma etapa: por isso o benchmark o
+    informa uma vez por execução, e a checagem de memória mede em um processo próprio.
+    """
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return round(own, 1), round(children, 1)
+
+
+class StageTimer:
+    """Mede tempo de parede e de CPU de cada etapa de um cenário"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result = func(*args, **kwargs)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.stages[name] = {
+            "wall_s": round(time.perf_counter() - wall, 4),
+            "cpu_s": round(time.process_time() - cpu, 4),
+            "children_cpu_s": round(
+                (children_after.ru_utime + children_after.ru_stime)
+                - (children.ru_utime + children.ru_stime),
+                4,
+            ),
+        }
+        print(f"  {name:<22} {self.stages[name]['wall_s']:>9.3f}s")
+        return result
+
+
+def seek_latency(video_path, samples=50, seed=0):
+    """Latência média e p95 de seeks aleatórios no FrameServer do preview"""
+    from FrameServer import FrameServer
+
+    server = FrameServer(video_path, on_frame=lambda idx, frame: None, prefetch_ahead=0)
+    rng = random.Random(seed)
+    latencies = []
+    try:
+        for _ in range(samples):
+            idx = rng.randrange(max(1, server.total_frames))
+            started = time.perf_counter()
+            server._decode(idx)  # Sem cache: mede o custo real do seek
+            latencies.append(time.perf_counter() - started)
+    finally:
+        server.close()
+    latencies.sort()
+    return {
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+        "p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2),
+    }
+
+
+def run_scenario(work_dir, duration, resolution, threshold, min_silence_len):
+    print(f"🔹 Cenário {resolution} / {duration}s")
+    video_path = os.path.join(work_dir, f"bench_{resolution}_{duration}.mp4")
+    if not os.path.exists(video_path):
+        generate_media(video_path, duration, resolution)
+
+    timer = StageTimer()
+    envelope = timer.run("audio_extraction", AudioStream(video_path).envelope)
+    silent_parts = timer.run(
+        "detect_silence", envelope.detect_silence, min_silence_len, threshold
+    )
+    silent_parts = [(start / 1000, end / 1000) for start, end in silent_parts]
+
+    output_path = os.path.join(work_dir, f"out_{resolution}_{duration}.mp4")
+    processador = ProcessadorVideo(
+        video_path,
+        threshold,
+        output_path,
+        export_mode="segments",
+        min_silence_len=min_silence_len,
+        temp_folder=os.path.join(work_dir, f"parts_{resolution}_{duration}"),
+        # 🔹 O benchmark roda em máquinas só com CPU: fixamos libx264
+        encoder=EncoderSession("libx264"),
+    )
+    cut_files = timer.run("cut_video", processador.cut_video, silent_parts)
+    timer.run(
+        "concatenate_videos",
+        processador.concatenate_videos,
+        cut_files,
+        stream_copy=len(processador.segment_codecs) == 1,
+    )
+    for file in cut_files:
+        os.remove(file)
+
+    result = {
+        "duration_s": duration,
+        "resolution": resolution,
+        "silences_found": len(silent_parts),
+        "silences_expected": expected_silences(duration, min_silence_len),
+        "segments": len(cut_files),
+        "stages": timer.stages,
+    }
+    try:
+        result["preview_seek"] = seek_latency(video_path)
+    except ImportError:
+        print("⚠️ OpenCV não instalado, pulando latência de seek do preview.")
+    return result
+
+
+def rss_probe(media_path, cache_dir, threshold, min_silence_len):
+    """Análise completa do preview (forma de onda, envelope, calibração, detecção).
+
+    Roda em um processo próprio (`--rss-probe`) para que o pico de memória medido seja só
+    o da análise; a última linha impressa é o resultado em JSON.
+    """
+    from MediaCache import MediaCache
+
+    cache = MediaCache(cache_dir)
+    cache.waveform(media_path)
+    envelope = cache.envelope(media_path)
+    calibration = Calibration(envelope, min_silence_len)
+    calibration.table()
+    silent_parts = envelope.detect_silence(min_silence_len, threshold)
+    print(json.dumps({
+        "duration_s": len(envelope) / 1000,
+        "silences_found": len(silent_parts),
+        "suggested_threshold": calibration.suggested_threshold,
+        "peak_rss_mb": peak_rss_mb()[0],
+    }))
+    return 0
+
+
+def rss_check(work_dir, hours, limit_mb, threshold, min_silence_len):
+    """Verifica se o pico de memória da análise de uma fonte longa fica abaixo do limite"""
+    print(f"🔹 Checagem de memória: {hours}h de áudio, limite {limit_mb} MB")
+    media_path = os.path.join(work_dir, f"long_{hours}h.m4a")
+    if not os.path.exists(media_path):
+        generate_long_audio(media_path, hours)
+
+    with tempfile.TemporaryDirectory(prefix="gapremoval_rss_") as cache_dir:
+        completed = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__), "--rss-probe", media_path,
+                "--rss-cache", cache_dir,
+                "--threshold", str(threshold), "--min-silence", str(min_silence_len),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result.update(
+        hours=hours,
+        limit_mb=limit_mb,
+        silences_expected=expected_silences(hours * 3600, min_silence_len),
+        passed=result["peak_rss_mb"] <= limit_mb,
+    )
+    marker = "✅" if result["passed"] else "❌"
+    print(f"{marker} Pico de memória da análise: {result['peak_rss_mb']} MB (limite {limit_mb} MB)")
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Compara os tempos de parede com a baseline; devolve a lista de regressões"""
+    regressions = []
+    previous = {(s["resolution"], s["duration_s"]): s for s in baseline["scenarios"]}
+    for scenario in results["scenarios"]:
+        old = previous.get((scenario["resolution"], scenario["duration_s"]))
+        if old is None:
+            continue
+        for stage, metrics in scenario["stages"].items():
+            if stage not in old["stages"] or not old["stages"][stage]["wall_s"]:
+                continue
+            ratio = metrics["wall_s"] / old["stages"][stage]["wall_s"]
+            marker = "❌" if ratio > 1 + tolerance else "✅"
+            print(f"{marker} {scenario['resolution']}/{scenario['duration_s']}s {stage}: {ratio:.2f}x")
+            if ratio > 1 + tolerance:
+                regressions.append((scenario["resolution"], scenario["duration_s"], stage, ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark reproduzível do GapRemoval")
+    parser.add_argument("--durations", type=int, nargs="+", default=[60, 600])
+    parser.add_argument("--resolutions", nargs="+", default=["640x360", "1280x720"])
+    parser.add_argument("--threshold", type=float, default=-40)
+    parser.add_argument("--min-silence", type=int, default=700)
+    parser.add_argument("--work-dir", help="Pasta para as mídias geradas (reaproveitadas)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Regressão aceitável (0.15 = 15%%)")
+    parser.add_argument("--rss-hours", type=float, default=0, help="Horas de áudio da checagem de memória (0 = pula)")
+    parser.add_argument("--rss-limit-mb", type=float, default=250, help="Pico de memória aceitável da análise")
+    parser.add_argument("--rss-probe", help=argparse.SUPPRESS)
+    parser.add_argument("--rss-cache", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.rss_probe:
+        return rss_probe(args.rss_probe, args.rss_cache, args.threshold, args.min_silence)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="gapremoval_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": [
+            run_scenario(work_dir, duration, resolution, args.threshold, args.min_silence)
+            for resolution in args.resolutions
+            for duration in args.durations
+        ],
+    }
+    own_rss, children_rss = peak_rss_mb()
+    results["peak_rss_mb"] = {"own": own_rss, "children": children_rss}
+    if args.rss_hours:
+        results["rss_check"] = rss_check(
+            work_dir, args.rss_hours, args.rss_limit_mb, args.threshold, args.min_silence
+        )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            return 1
+    return 0 if results.get("rss_check", {}).get("passed", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
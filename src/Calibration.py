@@ -0,0 +1,160 @@
+import numpy as np
+
+from SilenceDetector import db_to_float
+
+
+def rolling_min(values, width):
+    """Mínimo de cada janela values[i:i + width] em O(n) (van Herk / Gil-Werman)"""
+    n = len(values) - width + 1
+    if n <= 0:
+        return values[:0]
+    pad = (-len(values)) % width
+    blocks = np.concatenate((values, np.full(pad, np.inf))).reshape(-1, width)
+    prefix = np.minimum.accumulate(blocks, axis=1).ravel()
+    suffix = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    # 🔹 A janela começa no bloco de i e termina no bloco de i + width - 1
+    return np.minimum(suffix[:n], prefix[width - 1:width - 1 + n])
+
+
+def histogram_percentile(counts, edges, q):
+    """Percentil `q` aproximado (borda superior do bin) a partir de um histograma"""
+    cumulative = np.cumsum(counts)
+    idx = int(np.searchsorted(cumulative, cumulative[-1] * q / 100))
+    return float(edges[min(idx + 1, len(edges) - 1)])
+
+
+def otsu(counts, centers):
+    """Limiar que melhor separa o histograma em duas classes (ruído e fala)"""
+    weights = counts.astype(np.float64)
+    w0 = np.cumsum(weights)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(weights * centers)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean0 = m0 / w0
+        mean1 = (m0[-1] - m0) / w1
+        between = w0 * w1 * (mean0 - mean1) ** 2
+    between[~np.isfinite(between)] = -1
+    # 🔹 Com um vão vazio entre as classes o máximo é um platô: usa o meio dele
+    best = np.flatnonzero(between >= between.max() * (1 - 1e-9))
+    split = int(best[len(best) // 2])
+    return float(centers[split]), float(mean0[split]), float(mean1[split])
+
+
+class Calibration:
+    """Sugere o limiar de silêncio a partir do histograma de volume do próprio vídeo.
+
+    Tudo sai do envelope de energia da primeira leitura do áudio: o histograma (em janelas
+    de `window_ms`) separa o ruído de fundo da fala, e a duração final prevista de
+    qualquer limiar é uma busca binária em uma tabela calculada uma vez, sem detectar de
+    novo. A previsão é a da detecção, antes do pós-processamento dos intervalos.
+
+    O envelope é lido em blocos (`Envelope.BLOCK_MS`) e só histogramas ficam na memória,
+    então o custo não cresce com a duração do vídeo.
+    """
+
+    MIN_DB = -100.0
+    BIN_DB = 0.5
+
+    def __init__(self, envelope, min_silence_len=700, window_ms=10, method="otsu"):
+        self.envelope = envelope
+        self.min_silence_len = int(min_silence_len)
+        self.method = method
+        self.edges = np.arange(self.MIN_DB, self.BIN_DB, self.BIN_DB)
+        self.histogram = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        for levels in envelope.db_blocks(window_ms):
+            levels = np.clip(levels, self.MIN_DB, 0.0)
+            self.histogram += np.histogram(levels, bins=self.edges)[0]
+        self._cover = None
+
+        centers = (self.edges[:-1] + self.edges[1:]) / 2
+        if not self.histogram.any():
+            self.noise_floor, self.speech_level = self.MIN_DB, 0.0
+            split = self.noise_floor + 0.4 * (self.speech_level - self.noise_floor)
+        elif method == "percentile":
+            self.noise_floor = histogram_percentile(self.histogram, self.edges, 10)
+            self.speech_level = histogram_percentile(self.histogram, self.edges, 90)
+            split = self.noise_floor + 0.4 * (self.speech_level - self.noise_floor)
+        else:
+            split, self.noise_floor, self.speech_level = otsu(self.histogram, centers)
+        self.split = split
+
+    @property
+    def suggested_threshold(self):
+        """Limiar sugerido, dentro da faixa do slider de sensibilidade (-60 a -10 dB)"""
+        return int(round(min(max(self.split, -60), -10)))
+
+    def silence_cover(self):
+        """Tabela (níveis, ms acumulados): quantos ms são silêncio com o RMS inteiro até cada nível.
+
+        Uma janela de `min_silence_len` ms começando em i é silenciosa quando o RMS inteiro
+        dela fica abaixo do limiar; um ms está dentro de um trecho silencioso quando alguma
+        janela que o contém é silenciosa, ou seja, quando o menor RMS entre essas janelas
+        passa no limiar. É a mesma regra de `Envelope.detect_silence`. Cada bloco de ms
+        guarda só a contagem de cada nível, que cabe em um dicionário pequeno.
+        """
+        if self._cover is None:
+            window = self.min_silence_len
+            seg_len = len(self.envelope)
+            if window <= 0 or seg_len < window:
+                covered = seg_len if window <= 0 else 0
+                self._cover = (np.array([-1.0]), np.array([covered]))
+                return self._cover
+
+            totals = {}
+            n_windows = seg_len - window + 1
+            block = max(self.envelope.BLOCK_MS, window)
+            for start in range(0, seg_len, block):
+                stop = min(start + block, seg_len)
+                # 🔹 Os ms m são cobertos pelas janelas que começam em [m - window + 1, m]
+                first = max(0, start - window + 1)
+                last = min(n_windows, stop)
+                rms = self._window_rms(first, last)
+                padded = np.concatenate((
+                    np.full(first - (start - window + 1), np.inf),
+                    rms,
+                    np.full(stop - last, np.inf),
+                ))
+                levels, counts = np.unique(rolling_min(padded, window), return_counts=True)
+                for level, count in zip(levels.tolist(), counts.tolist()):
+                    totals[level] = totals.get(level, 0) + count
+
+            levels = np.array(sorted(totals))
+            self._cover = (levels, np.cumsum([totals[level] for level in levels]))
+        return self._cover
+
+    def _window_rms(self, first, last):
+        """RMS inteiro das janelas que começam em [first, last)"""
+        window = self.min_silence_len
+        energy = self.envelope.energy_range(first, last + window - 1)
+        counts = self.envelope.counts_range(first, last + window - 1)
+        cum_energy = np.concatenate(([0], np.cumsum(energy)))
+        cum_counts = np.concatenate(([0], np.cumsum(counts)))
+        window_energy = cum_energy[window:] - cum_energy[:-window]
+        window_counts = cum_counts[window:] - cum_counts[:-window]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rms = np.floor(np.sqrt(window_energy / window_counts))
+        rms[window_counts == 0] = -1  # Janela sem amostras: sempre silêncio
+        return rms
+
+    def removed_seconds(self, threshold):
+        """Duração (s) que os trechos silenciosos somariam com este limiar"""
+        limit = np.floor(db_to_float(threshold) * self.envelope.max_amplitude)
+        levels, covered = self.silence_cover()
+        idx = int(np.searchsorted(levels, limit, side="right"))
+        return int(covered[idx - 1]) / 1000 if idx else 0.0
+
+    def predicted_duration(self, threshold):
+        """Duração (s) prevista do vídeo exportado com este limiar"""
+        return max(0.0, len(self.envelope) / 1000 - self.removed_seconds(threshold))
+
+    def table(self, thresholds=range(-60, -9, 5)):
+        """Duração prevista para cada limiar candidato"""
+        total = len(self.envelope) / 1000
+        return [
+            {
+                "threshold": threshold,
+                "predicted_s": round(self.predicted_duration(threshold), 3),
+                "removed_s": round(total - self.predicted_duration(threshold), 3),
+            }
+            for threshold in thresholds
+        ]
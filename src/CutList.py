@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import re
+from fractions import Fraction
+
+# 🔹 Bytes lidos do começo e do fim do arquivo para a impressão digital portátil
+FINGERPRINT_SAMPLE = 1024 * 1024
+
+
+def content_fingerprint(video_path):
+    """Identifica o conteúdo de um vídeo independente do caminho e da data de modificação.
+
+    Usa o tamanho e um SHA-1 do primeiro e do último MiB, para que a mesma lista de cortes
+    valha em outra máquina onde o arquivo foi copiado para outra pasta.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE))
+        if size > FINGERPRINT_SAMPLE:
+            f.seek(max(FINGERPRINT_SAMPLE, size - FINGERPRINT_SAMPLE))
+            digest.update(f.read(FINGERPRINT_SAMPLE))
+    return {"size": size, "sha1": digest.hexdigest()}
+
+
+def _timecode(seconds, fps):
+    """Timecode NON-DROP: conta os frames na taxa real e escreve na base inteira (30 para 29.97)"""
+    base = int(round(fps))
+    frames = int(round(seconds * fps))
+    hours, frames = divmod(frames, 3600 * base)
+    minutes, frames = divmod(frames, 60 * base)
+    secs, frames = divmod(frames, base)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
+
+
+def _seconds(timecode, fps):
+    base = int(round(fps))
+    hours, minutes, secs, frames = (int(part) for part in re.split("[:;]", timecode))
+    return (((hours * 60 + minutes) * 60 + secs) * base + frames) / fps
+
+
+def _rate(fps):
+    """Frame rate exato para o comentário da EDL (30000/1001 em vez de 29.97002997)"""
+    rate = Fraction(fps).limit_denominator(1001)
+    return str(rate.numerator) if rate.denominator == 1 else f"{rate.numerator}/{rate.denominator}"
+
+
+class CutList:
+    """Trechos silenciosos (em segundos) de um vídeo, prontos para exportar sem reanalisar.
+
+    Guarda a impressão digital do conteúdo da fonte e os parâmetros da detecção, e pode
+    ser salva/lida como JSON (formato completo) ou como EDL CMX3600 com os trechos mantidos.
+    """
+
+    VERSION = 1
+
+    def __init__(self, silent_parts, source=None, duration=None, fps=30, params=None):
+        self.silent_parts = [(float(start), float(end)) for start, end in silent_parts]
+        self.source = source
+        self.duration = duration
+        self.fps = fps
+        self.params = params or {}
+
+    @classmethod
+    def from_video(cls, video_path, silent_parts, duration=None, fps=30, **params):
+        return cls(silent_parts, content_fingerprint(video_path), duration, fps, params)
+
+    def matches(self, video_path):
+        """True se a lista foi gerada para este mesmo conteúdo de vídeo"""
+        if self.source is None or not os.path.exists(video_path):
+            return False
+        return content_fingerprint(video_path) == self.source
+
+    def kept_intervals(self):
+        """Intervalos mantidos entre os silêncios (o final depende de `duration`)"""
+        kept = []
+        last_end = 0.0
+        for start, end in self.silent_parts:
+            if start > last_end:
+                kept.append((last_end, start))
+            last_end = end
+        if self.duration is not None and self.duration > last_end:
+            kept.append((last_end, self.duration))
+        return kept
+
+    def to_dict(self):
+        return {
+            "version": self.VERSION,
+            "source": self.source,
+            "duration": self.duration,
+            "fps": self.fps,
+            "params": self.params,
+            "silent_parts": [[start, end] for start, end in self.silent_parts],
+        }
+
+    def save_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load_json(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Versão de lista de cortes não suportada: {data.get('version')}")
+        return cls(
+            data["silent_parts"], data.get("source"), data.get("duration"),
+            data.get("fps", 30), data.get("params"),
+        )
+
+    def save_edl(self, path, title="GapRemoval", clip_name=None):
+        """Grava os trechos mantidos como eventos de corte de uma EDL CMX3600.
+
+        A EDL usa timecode inteiro (NON-DROP) e perde a precisão abaixo de um frame; o
+        frame rate exato, a duração e a impressão digital da fonte vão em comentários
+        para a volta.
+        """
+        fps = self.fps
+        lines = [f"TITLE: {title}", "FCM: NON-DROP FRAME", f"* FPS: {_rate(fps)}", ""]
+        record = 0.0
+        for number, (start, end) in enumerate(self.kept_intervals(), start=1):
+            length = end - start
+            lines.append(
+                f"{number:03d}  AX       AA/V  C        "
+                f"{_timecode(start, fps)} {_timecode(end, fps)} "
+                f"{_timecode(record, fps)} {_timecode(record + length, fps)}"
+            )
+            if clip_name:
+                lines.append(f"* FROM CLIP NAME: {clip_name}")
+            record += length
+        lines.append("")
+        if self.duration is not None:
+            lines.append(f"* SOURCE DURATION: {self.duration}")
+        if self.source is not None:
+            lines.append(f"* SOURCE FINGERPRINT: {json.dumps(self.source)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @classmethod
+    def load_edl(cls, path, fps=None):
+        """Lê uma EDL CMX3600: os silêncios são os buracos entre os eventos da fonte.
+
+        O frame rate dos timecodes vem do comentário `* FPS:` gravado por `save_edl`;
+        `fps` só vale para EDLs de outros programas (padrão 30).
+        """
+        timecodes = []
+        duration = None
+        source = None
+        event = re.compile(r"^\d+\s+\S+\s+\S+\s+C\s+(\S+)\s+(\S+)\s+\S+\s+\S+")
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                match = event.match(line)
+                if match:
+                    timecodes.append((match[1], match[2]))
+                elif line.startswith("* FPS:"):
+                    fps = float(Fraction(line.split(":", 1)[1].strip()))
+                elif line.startswith("* SOURCE DURATION:"):
+                    duration = float(line.split(":", 1)[1])
+                elif line.startswith("* SOURCE FINGERPRINT:"):
+                    source = json.loads(line.split(":", 1)[1])
+
+        fps = fps or 30
+        kept = [(_seconds(start, fps), _seconds(end, fps)) for start, end in timecodes]
+        silent_parts = []
+        last_end = 0.0
+        for start, end in sorted(kept):
+            if start > last_end:
+                silent_parts.append((last_end, start))
+            last_end = max(last_end, end)
+        # 🔹 O último evento termina no frame mais próximo da duração: sobra menor que meio
+        # frame é arredondamento do timecode, não silêncio
+        if duration is not None and duration - last_end > 0.5 / fps:
+            silent_parts.append((last_end, duration))
+        return cls(silent_parts, source, duration, fps)
+
+    def save(self, path, **kwargs):
+        """Grava no formato indicado pela extensão (.edl ou JSON)"""
+        if path.lower().endswith(".edl"):
+            self.save_edl(path, **kwargs)
+        else:
+            self.save_json(path)
+
+    @classmethod
+    def load(cls, path, fps=None):
+        if path.lower().endswith(".edl"):
+            return cls.load_edl(path, fps)
+        return cls.load_json(path)
@@ -0,0 +1,193 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from MediaCache import default_cache_dir
+
+FALLBACK = "libx264"
+
+# 🔹 Perfis de argumentos por encoder: cada um só recebe as opções que ele entende
+PROFILES = {
+    "h264_nvenc": {
+        "gpu": "NVIDIA",
+        "args": {
+            "preset": "p5",
+            "tune": "hq",
+            "rc": "vbr",
+            "cq": 19,
+            "bf": 2,
+            "g": 60,
+            "maxrate": "50M",
+            "bufsize": "25M",
+        },
+    },
+    "h264_amf": {
+        "gpu": "AMD",
+        "args": {"quality": "quality", "rc": "cqp", "qp_i": 18, "qp_p": 20, "qp_b": 22, "g": 60},
+    },
+    "h264_qsv": {
+        "gpu": "Intel",
+        "args": {"preset": "medium", "global_quality": 19, "bf": 2, "g": 60},
+    },
+    # Na CPU o gargalo é o encoder: preset rápido com CRF um pouco mais baixo para compensar
+    "libx264": {
+        "gpu": "CPU",
+        "args": {"preset": "faster", "crf": 17, "bf": 2, "g": 60},
+    },
+}
+
+PREFERENCE = ("h264_nvenc", "h264_amf", "h264_qsv", FALLBACK)
+
+
+def run_command(args, timeout=30):
+    """Executa um comando e devolve (código de saída, stdout + stderr)"""
+    try:
+        process = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return 1, str(e)
+    return process.returncode, process.stdout + process.stderr
+
+
+class EncoderRegistry:
+    """Descobre quais encoders H.264 realmente funcionam nesta máquina.
+
+    Estar listado em `ffmpeg -encoders` não basta (driver ausente, GPU sem suporte): cada
+    candidato faz uma codificação de teste de poucos quadros. O resultado fica salvo em
+    disco por ffmpeg e expira depois de `max_age` segundos. `runner(args)` pode ser
+    trocado por uma função falsa para testar a escolha sem GPU e sem ffmpeg.
+    """
+
+    CACHE_VERSION = 1
+    MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, runner=run_command, cache_path=None, max_age=MAX_AGE):
+        self.runner = runner
+        self.cache_path = cache_path or os.path.join(default_cache_dir(), "encoders.json")
+        self.max_age = max_age
+        self._available = None
+        self._lock = threading.Lock()
+
+    def ffmpeg_identity(self):
+        """Caminho e versão do ffmpeg: se mudarem, os testes são refeitos"""
+        code, output = self.runner(["ffmpeg", "-hide_banner", "-version"])
+        version = output.splitlines()[0] if code == 0 and output else "unknown"
+        return {"path": shutil.which("ffmpeg"), "version": version}
+
+    def listed(self):
+        """Encoders conhecidos que aparecem em `ffmpeg -encoders`"""
+        code, output = self.runner(["ffmpeg", "-hide_banner", "-encoders"])
+        if code != 0:
+            return []
+        names = {line.split()[1] for line in output.splitlines() if len(line.split()) > 1}
+        return [name for name in PREFERENCE if name in names]
+
+    def probe(self, name):
+        """Codificação de teste de alguns quadros sintéticos; True se o encoder funcionou"""
+        args = [
+            "ffmpeg", "-hide_banner", "-v", "error",
+            "-f", "lavfi", "-i", "color=c=black:s=256x144:r=30:d=0.2",
+            "-frames:v", "5",
+            "-c:v", name,
+        ]
+        for key, value in PROFILES[name]["args"].items():
+            args += [f"-{key}", str(value)]
+        code, output = self.runner(args + ["-f", "null", "-"])
+        if code != 0:
+            print(f"⚠️ Encoder {name} listado, mas o teste falhou: {output.strip()[-200:]}")
+        return code == 0
+
+    def _load(self, identity):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (
+            data.get("version") != self.CACHE_VERSION
+            or data.get("ffmpeg") != identity
+            or time.time() - data.get("checked_at", 0) > self.max_age
+        ):
+            return None
+        return data.get("available")
+
+    def _save(self, identity, available):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": self.CACHE_VERSION,
+                        "ffmpeg": identity,
+                        "checked_at": time.time(),
+                        "available": available,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar os encoders testados. Erro: {e}")
+
+    def available(self, refresh=False):
+        """Encoders que passaram no teste, em ordem de preferência (libx264 sempre no fim)"""
+        with self._lock:
+            if self._available is None or refresh:
+                identity = self.ffmpeg_identity()
+                available = None if refresh else self._load(identity)
+                if available is None:
+                    available = [
+                        name for name in self.listed() if name != FALLBACK and self.probe(name)
+                    ]
+                    self._save(identity, available)
+                self._available = list(dict.fromkeys(available + [FALLBACK]))
+            return list(self._available)
+
+    def session(self):
+        """Sessão de um job começando pelo melhor encoder disponível"""
+        return EncoderSession(self.available()[0])
+
+
+class EncoderSession:
+    """Encoder usado por um job inteiro.
+
+    Depois da primeira falha real do encoder de GPU a sessão passa para libx264, e os
+    trechos seguintes já começam nele em vez de tentar a GPU de novo em cada um.
+    """
+
+    def __init__(self, encoder=FALLBACK):
+        self.preferred = encoder
+        self.video = encoder
+        self.audio = "aac"
+        self._lock = threading.Lock()
+
+    def args(self, codec=None):
+        """Argumentos de qualidade do perfil do encoder (o atual, por padrão)"""
+        return dict(PROFILES[codec or self.video]["args"])
+
+    def candidates(self):
+        """Encoders a tentar, em ordem, para a próxima codificação"""
+        return list(dict.fromkeys([self.video, FALLBACK]))
+
+    def report_failure(self, codec, error=None):
+        """Registra uma falha; se foi o encoder atual, o job inteiro troca para libx264"""
+        with self._lock:
+            if codec != self.video or codec == FALLBACK:
+                return
+            self.video = FALLBACK
+        print(f"🔄 {codec} falhou ({error}); o restante do job usa {FALLBACK}.")
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def default_registry():
+    """Registro compartilhado pelo processo (os testes rodam uma vez só)"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = EncoderRegistry()
+        return _default_registry
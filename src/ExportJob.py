@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ProcessadorVideo import ProcessadorVideo
+
+TMPFS_ROOT = "/dev/shm"
+
+
+def scratch_root(needed_bytes=0):
+    """Pasta base para os arquivos temporários: tmpfs se existir e couber, senão o temp do sistema"""
+    if os.path.isdir(TMPFS_ROOT) and os.access(TMPFS_ROOT, os.W_OK):
+        # 🔹 tmpfs ocupa RAM: só usamos com folga de 2x sobre o tamanho estimado
+        if shutil.disk_usage(TMPFS_ROOT).free > 2 * needed_bytes:
+            return TMPFS_ROOT
+    return tempfile.gettempdir()
+
+
+class ExportJob:
+    """Uma exportação com pasta de trabalho própria, criada e apagada pelo próprio job.
+
+    Todos os arquivos intermediários ficam em `work_dir`, e o vídeo final é escrito em um
+    arquivo oculto `.partial` ao lado do destino (mesmo disco, então o rename no fim é
+    atômico), então jobs simultâneos nunca compartilham caminhos e uma saída pela metade
+    nunca parece concluída nem é tomada como vídeo de entrada por um lote retomado.
+    """
+
+    PARTIAL_MARK = ".partial"
+
+    def __init__(self, video_path, output_path, silence_threshold, **options):
+        self.video_path = os.path.abspath(video_path)
+        self.output_path = os.path.abspath(output_path)
+        self.silence_threshold = silence_threshold
+        self.options = options  # Repassadas ao ProcessadorVideo
+        self.work_dir = None
+        self.status = "pending"
+        self.error = None
+        self.seconds = 0.0
+
+    @property
+    def partial_path(self):
+        folder, name = os.path.split(self.output_path)
+        stem, ext = os.path.splitext(name)
+        return os.path.join(folder, f".{stem}{self.PARTIAL_MARK}{ext}")
+
+    @classmethod
+    def is_partial(cls, path):
+        """True para saídas pela metade (de qualquer versão), que não são vídeos de entrada"""
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return stem.endswith(cls.PARTIAL_MARK)
+
+    def __enter__(self):
+        needed = os.path.getsize(self.video_path) if os.path.exists(self.video_path) else 0
+        self.work_dir = tempfile.mkdtemp(prefix="gapremoval_job_", dir=scratch_root(needed))
+        return self
+
+    def __exit__(self, *exc_info):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        return False
+
+    def run(self):
+        """Executa o pipeline completo dentro da pasta isolada e devolve o status final"""
+        started = time.perf_counter()
+        self.status = "running"
+        try:
+            with self:
+                processador = ProcessadorVideo(
+                    self.video_path,
+                    self.silence_threshold,
+                    self.partial_path,
+                    temp_folder=self.work_dir,
+                    **self.options,
+                )
+                processador.remove_silence()
+                if os.path.exists(self.partial_path) and os.path.getsize(self.partial_path) > 0:
+                    os.replace(self.partial_path, self.output_path)
+                    self.status = "done"
+                else:
+                    self.status = "failed"
+        except Exception as e:
+            self.status = "failed"
+            self.error = e
+            print(f"❌ Erro ao processar {self.video_path}. Detalhes: {e}")
+        self.seconds = time.perf_counter() - started
+        return self.status
+
+
+class JobScheduler:
+    """Executa até `max_jobs` exportações lado a lado dividindo um orçamento de threads"""
+
+    def __init__(self, max_jobs=2, thread_budget=None):
+        self.max_jobs = max(1, max_jobs)
+        self.thread_budget = thread_budget or os.cpu_count() or 2
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs)
+        self._outputs = set()
+        self._lock = threading.Lock()
+
+    @property
+    def threads_per_job(self):
+        return max(1, self.thread_budget // self.max_jobs)
+
+    def submit(self, job, on_done=None):
+        """Agenda um job; on_done(job) é chamado na thread do job quando ele termina"""
+        with self._lock:
+            if job.output_path in self._outputs:
+                raise ValueError(f"Já existe um job gravando em {job.output_path}")
+            self._outputs.add(job.output_path)
+        job.options.setdefault("thread_budget", self.threads_per_job)
+
+        def run():
+            try:
+                job.run()
+                if on_done:
+                    on_done(job)
+            finally:
+                with self._lock:
+                    self._outputs.discard(job.output_path)
+            return job
+
+        return self._pool.submit(run)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        return False
@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class FrameServer:
+    """Entrega frames do preview a partir de uma única thread de decodificação.
+
+    Pedidos novos substituem os antigos (só o último alvo do slider é decodificado), os
+    frames já redimensionados ficam em um cache LRU limitado por memória e, quando não há
+    pedidos, a thread lê adiante da posição atual de forma sequencial, que é bem mais
+    barato que um seek por frame.
+    """
+
+    # Avanços curtos são feitos com grab() em vez de seek
+    MAX_GRAB_SKIP = 12
+
+    def __init__(
+        self,
+        video_path,
+        on_frame,
+        size=(640, 360),
+        max_cache_bytes=256 * 1024**2,
+        prefetch_ahead=48,
+    ):
+        self.video_path = video_path
+        self.on_frame = on_frame  # Chamado como on_frame(indice, frame) na thread de decodificação
+        self.size = size
+        self.max_cache_bytes = max_cache_bytes
+        # 🔹 O prefetch nunca pode passar do que cabe no cache, senão ele mesmo se expulsaria
+        frame_bytes = size[0] * size[1] * 3
+        self.prefetch_ahead = min(prefetch_ahead, max(0, max_cache_bytes // frame_bytes - 1))
+
+        self.cap = cv2.VideoCapture(video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._next_pos = 0  # Próximo frame que cap.read() devolveria
+        self._playhead = 0
+        self._request = None
+        self._stopped = False
+        self._decode_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, frame_idx):
+        """Pede um frame; pedidos ainda não atendidos são descartados"""
+        with self._cond:
+            self._request = frame_idx
+            self._cond.notify()
+
+    def get_frame(self, frame_idx):
+        """Devolve um frame de forma síncrona (usado para o primeiro quadro do preview)"""
+        frame = self._cached(frame_idx)
+        if frame is None:
+            frame = self._decode(frame_idx)
+        return frame
+
+    def switch_source(self, path):
+        """Passa a decodificar de outro arquivo com os mesmos frames (ex.: o proxy).
+
+        Depois de `close()` não faz nada: o proxy pode ficar pronto com o preview já fechado.
+        """
+        if self._stopped:
+            return
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"⚠️ Não foi possível abrir {path}, mantendo a fonte atual.")
+            return
+        with self._decode_lock:
+            # 🔹 close() libera o vídeo com esta mesma trava: se já passou por ela, descarta a nova fonte
+            if self._stopped:
+                cap.release()
+                return
+            self.cap.release()
+            self.cap = cap
+            self._next_pos = -1  # Força um seek no próximo pedido
+
+    def close(self):
+        """Encerra a thread e libera o vídeo"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=1)
+        with self._decode_lock:
+            if self.cap.isOpened():
+                self.cap.release()
+
+    def _cached(self, frame_idx):
+        with self._decode_lock:
+            frame = self._cache.get(frame_idx)
+            if frame is not None:
+                self._cache.move_to_end(frame_idx)
+            return frame
+
+    def _store(self, frame_idx, frame):
+        self._cache[frame_idx] = frame
+        self._cache_bytes += frame.nbytes
+        while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+
+    def _decode(self, frame_idx):
+        """Decodifica um frame, reaproveitando a posição atual do leitor quando possível"""
+        with self._decode_lock:
+            frame_idx = max(0, min(frame_idx, self.total_frames - 1))
+            skip = frame_idx - self._next_pos
+            if 0 <= skip <= self.MAX_GRAB_SKIP:
+                for _ in range(skip):
+                    self.cap.grab()
+            else:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+            ret, frame = self.cap.read()
+            if not ret:
+                self._next_pos = -1  # Força um seek no próximo pedido
+                # 🔹 Guardamos o quadro preto para o prefetch não insistir no mesmo índice
+                frame = np.zeros((self.size[1], self.size[0], 3), dtype=np.uint8)
+                self._store(frame_idx, frame)
+                return frame
+
+            self._next_pos = frame_idx + 1
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frame = cv2.resize(frame, self.size)
+            self._store(frame_idx, frame)
+            return frame
+
+    def _next_prefetch(self):
+        """Primeiro frame ainda fora do cache logo à frente da posição atual"""
+        last = min(self._playhead + self.prefetch_ahead, self.total_frames - 1)
+        for frame_idx in range(self._playhead, last + 1):
+            if frame_idx not in self._cache:
+                return frame_idx
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and self._request is None and self._next_prefetch() is None:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                frame_idx, self._request = self._request, None
+
+            if frame_idx is not None:
+                frame = self._cached(frame_idx)
+                if frame is None:
+                    frame = self._decode(frame_idx)
+                self._playhead = frame_idx
+                self.on_frame(frame_idx, frame)
+            else:
+                # 🔹 Sem pedidos pendentes: lê adiante, um frame por vez, para não atrasar o slider
+                prefetch_idx = self._next_prefetch()
+                if prefetch_idx is not None:
+                    self._decode(prefetch_idx)
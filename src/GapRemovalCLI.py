@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import as_completed
+
+from CutList import CutList
+from EncoderRegistry import PREFERENCE, EncoderSession, default_registry
+from ExportJob import ExportJob, JobScheduler
+from Intervals import IntervalProcessor
+from MediaCache import SegmentCache, source_fingerprint
+from Metrics import PipelineMetrics
+from ProcessadorVideo import ProcessadorVideo
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov")
+
+
+def find_videos(paths, recursive=False):
+    """Expande arquivos e pastas da linha de comando em uma lista ordenada de vídeos"""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for folder, _, files in os.walk(path):
+                    videos += [os.path.join(folder, name) for name in files]
+            else:
+                videos += [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            videos.append(path)
+    return sorted(
+        os.path.abspath(video)
+        for video in videos
+        if os.path.isfile(video)
+        and video.lower().endswith(VIDEO_EXTENSIONS)
+        # 🔹 Saídas pela metade de um lote interrompido não são vídeos de entrada
+        and not ExportJob.is_partial(video)
+    )
+
+
+class Manifest:
+    """Registro em JSON dos vídeos já exportados, para retomar um lote interrompido"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_done(self, video_path, output_path):
+        """True se este vídeo, na mesma versão, já gerou a saída esperada"""
+        entry = self.entries.get(output_path)
+        return (
+            entry is not None
+            and entry.get("status") == "done"
+            and entry.get("source") == source_fingerprint(video_path)
+            and os.path.exists(output_path)
+        )
+
+    def record(self, video_path, output_path, status, seconds):
+        """Grava o resultado de um job (escrita atômica, segura entre threads)"""
+        with self.lock:
+            self.entries[output_path] = {
+                "source": source_fingerprint(video_path),
+                "status": status,
+                "seconds": round(seconds, 2),
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            folder = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile(
+                "w", dir=folder, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(f.name, self.path)
+
+
+def output_path_for(video_path, output_dir, suffix):
+    stem, ext = os.path.splitext(os.path.basename(video_path))
+    folder = output_dir or os.path.dirname(video_path)
+    return os.path.abspath(os.path.join(folder, f"{stem}{suffix}{ext}"))
+
+
+def cut_list_path(video_path, folder, ext=".cutlist.json"):
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(folder, stem + ext)
+
+
+def find_cut_list(video_path, folder):
+    """CutList salva para este vídeo na pasta (JSON ou EDL), ou None"""
+    for ext in (".cutlist.json", ".edl"):
+        path = cut_list_path(video_path, folder, ext)
+        if os.path.exists(path):
+            try:
+                return CutList.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Lista de cortes ilegível ({path}). Erro: {e}")
+    return None
+
+
+def export_cut_lists(videos, args):
+    """Só detecta os silêncios e grava as listas de cortes (JSON e EDL) para renderizar depois"""
+    os.makedirs(args.cut_lists, exist_ok=True)
+    for video_path in videos:
+        print(f"🔎 Analisando {video_path}")
+        processador = ProcessadorVideo(
+            video_path,
+            args.threshold,
+            output_path=None,
+            min_silence_len=args.min_silence,
+            detection_workers=args.detect_workers,
+            encoder=EncoderSession(),  # Nada é codificado: não precisa testar a GPU
+        )
+        cut_list = processador.build_cut_list()
+        cut_list.save_json(cut_list_path(video_path, args.cut_lists))
+        cut_list.save_edl(
+            cut_list_path(video_path, args.cut_lists, ".edl"),
+            clip_name=os.path.basename(video_path),
+        )
+    print(f"✅ {len(videos)} listas de cortes gravadas em {args.cut_lists}")
+    return 0
+
+
+def encoder_session(name):
+    """Sessão de encoder de um job: "auto" usa o melhor encoder testado nesta máquina"""
+    return default_registry().session() if name == "auto" else EncoderSession(name)
+
+
+def build_job(video_path, output_path, args):
+    """Job isolado (pasta de trabalho própria) com as opções da linha de comando"""
+    trace_path = None
+    if args.trace_dir:
+        stem = os.path.splitext(os.path.basename(output_path))[0]
+        trace_path = os.path.join(args.trace_dir, f"{stem}.trace.jsonl")
+    return ExportJob(
+        video_path,
+        output_path,
+        args.threshold,
+        export_mode=args.mode,
+        workers=args.workers,
+        min_silence_len=args.min_silence,
+        metrics=PipelineMetrics(trace_path=trace_path),
+        detection_workers=args.detect_workers,
+        segment_cache=SegmentCache() if args.segment_cache else None,
+        encoder=encoder_session(args.encoder),
+        cut_list=find_cut_list(video_path, args.cut_lists) if args.cut_lists else None,
+        interval_processor=IntervalProcessor(
+            padding=args.padding,
+            merge_gap=args.merge_gap,
+            min_keep=args.min_keep,
+            snap=None if args.snap == "none" else args.snap,
+        ),
+    )
+
+
+def threshold_arg(value):
+    return value if value == "auto" else float(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Remove os silêncios de vídeos em lote, sem interface gráfica."
+    )
+    parser.add_argument("inputs", nargs="+", help="Arquivos de vídeo ou pastas")
+    parser.add_argument("-o", "--output-dir", help="Pasta de saída (padrão: ao lado do original)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Entra nas subpastas")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=threshold_arg,
+        default=-40,
+        help="Limiar de silêncio em dBFS, ou 'auto' para calibrar pelo volume de cada vídeo",
+    )
+    parser.add_argument("-m", "--min-silence", type=int, default=700, help="Silêncio mínimo em ms")
+    parser.add_argument("--padding", type=float, default=0.1, help="Folga (s) em volta de cada fala")
+    parser.add_argument(
+        "--merge-gap", type=float, default=0.3, help="Une trechos separados por menos que isso (s)"
+    )
+    parser.add_argument(
+        "--min-keep", type=float, default=0.25, help="Descarta trechos mantidos mais curtos (s)"
+    )
+    parser.add_argument(
+        "--snap", choices=("frames", "keyframes", "none"), default="frames", help="Alinhamento dos cortes"
+    )
+    parser.add_argument(
+        "--mode", choices=("graph", "segments", "smart", "stream"), default="graph", help="Modo de exportação"
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=("auto",) + PREFERENCE,
+        default="auto",
+        help="Encoder de vídeo (auto: o melhor disponível, com troca para libx264 se falhar)",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="Vídeos processados ao mesmo tempo")
+    parser.add_argument("--workers", type=int, help="Workers de segmentos por vídeo (modo segments)")
+    parser.add_argument(
+        "--detect-workers", type=int, default=1, help="Processos para analisar o áudio de cada vídeo"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=os.cpu_count() or 2, help="Orçamento global de threads de CPU"
+    )
+    parser.add_argument(
+        "--segment-cache",
+        action="store_true",
+        help="Reaproveita trechos já codificados entre exportações (modo segments)",
+    )
+    parser.add_argument("--suffix", default="_sem_silencio", help="Sufixo do arquivo de saída")
+    parser.add_argument("--manifest", help="Arquivo de manifesto (padrão: na pasta de saída)")
+    parser.add_argument("--trace-dir", help="Grava um trace JSON lines de métricas por vídeo")
+    parser.add_argument(
+        "--cut-lists", help="Pasta de listas de cortes (<vídeo>.cutlist.json ou <vídeo>.edl)"
+    )
+    parser.add_argument(
+        "--detect-only",
+        action="store_true",
+        help="Só detecta os silêncios e grava as listas de cortes em --cut-lists",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    videos = find_videos(args.inputs, args.recursive)
+    if not videos:
+        print("❌ Nenhum vídeo encontrado.")
+        return 1
+
+    if args.detect_only:
+        if not args.cut_lists:
+            print("❌ --detect-only precisa de --cut-lists.")
+            return 1
+        return export_cut_lists(videos, args)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(
+        args.output_dir or os.getcwd(), "gapremoval_manifest.json"
+    )
+    manifest = Manifest(manifest_path)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+
+    jobs = []
+    for video_path in videos:
+        if os.path.splitext(video_path)[0].endswith(args.suffix):
+            continue  # 🔹 Saída de um lote anterior na mesma pasta
+        output_path = output_path_for(video_path, args.output_dir, args.suffix)
+        if manifest.is_done(video_path, output_path):
+            print(f"⏭️ Já exportado, pulando: {video_path}")
+        else:
+            jobs.append((video_path, output_path))
+
+    # 🔹 Cada vídeo recebe uma fatia do orçamento global para não saturar a CPU
+    concurrent = max(1, min(args.jobs, len(jobs) or 1))
+    scheduler = JobScheduler(max_jobs=concurrent, thread_budget=args.threads)
+    print(
+        f"🔹 {len(jobs)} vídeos na fila, {concurrent} por vez, "
+        f"{scheduler.threads_per_job} threads cada"
+    )
+
+    def on_done(job):
+        manifest.record(job.video_path, job.output_path, job.status, job.seconds)
+
+    failures = 0
+    with scheduler:
+        futures = []
+        for video_path, output_path in jobs:
+            print(f"🔹 Processando {video_path}")
+            futures.append(scheduler.submit(build_job(video_path, output_path, args), on_done))
+        for future in as_completed(futures):
+            job = future.result()
+            if job.status != "done":
+                failures += 1
+                print(f"❌ Falhou: {job.video_path}")
+            else:
+                print(f"✅ Concluído: {job.video_path}")
+
+    print(f"🔹 Lote finalizado: {len(jobs) - failures} ok, {failures} com erro")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
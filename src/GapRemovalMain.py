@@ -1,16 +1,23 @@
+import time
+
+STARTED = time.perf_counter()  # 🔹 Base do tempo até a primeira janela
+
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 import os
-import tempfile
-from VideoPreview import VideoPreview
+import sys
+import threading
+
+# 🔹 VideoPreview (cv2, matplotlib, numpy, ffmpeg) só é importado ao abrir o preview
 
 class GapRemovalMain:
     def __init__(self, root):
         self.root = root
         self.root.overrideredirect(True)
         self.video_path = None
-        self.audio_path = None
+        self.preparing = None  # Thread que prepara o áudio do vídeo selecionado
+        self.preview_requested = False
 
         # Inicializa frames
         self.init_main_frame()
@@ -42,6 +49,9 @@ class GapRemovalMain:
         self.lbl_video = ttk.Label(self.main_frame, text="Nenhum vídeo selecionado")
         self.lbl_video.pack(anchor="w", pady=2)
 
+        self.lbl_status = ttk.Label(self.main_frame, text="")
+        self.lbl_status.pack(anchor="w", pady=2)
+
         ttk.Button(
             self.main_frame,
             text="📊 Abrir Preview",
@@ -53,24 +63,61 @@ class GapRemovalMain:
         self.video_path = filedialog.askopenfilename(filetypes=[("Vídeos", "*.mp4;*.mkv;*.avi")])
         if self.video_path:
             self.lbl_video.config(text=f"Vídeo: {os.path.basename(self.video_path)}")
-            self.audio_path = self.extract_audio(self.video_path)
-
-    def extract_audio(self, video_path):
-        temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
-        os.system(f'ffmpeg -i "{video_path}" -q:a 0 -map a "{temp_audio}" -y -loglevel quiet')
-        return temp_audio
+            self.prepare_video(self.video_path)
+
+    def set_status(self, text):
+        """Atualiza o status a partir de qualquer thread (a UI só é tocada no loop do Tk)"""
+        self.root.after(0, lambda: self.lbl_status.config(text=text))
+
+    def prepare_video(self, video_path):
+        """Lê o áudio (envelope + forma de onda) e testa os encoders em segundo plano"""
+
+        def work():
+            try:
+                self.set_status("🔄 Preparando o áudio...")
+                from MediaCache import MediaCache
+
+                MediaCache().waveform(video_path)
+                MediaCache().envelope(video_path)
+                self.set_status("🔄 Testando os encoders de vídeo...")
+                from EncoderRegistry import default_registry
+
+                encoder = default_registry().available()[0]
+                self.set_status(f"✅ Pronto (encoder: {encoder})")
+            except Exception as e:
+                self.set_status(f"⚠️ Falha ao preparar o vídeo: {e}")
+            self.root.after(0, self.preparation_done, video_path)
+
+        self.preparing = threading.Thread(target=work, daemon=True)
+        self.preparing.start()
+
+    def preparation_done(self, video_path):
+        if video_path != self.video_path:
+            return  # Preparação de um vídeo trocado no meio do caminho
+        self.preparing = None
+        if self.preview_requested:
+            self.preview_requested = False
+            self.open_preview()
 
     def open_preview(self):
-        if not self.video_path or not self.audio_path:
+        if not self.video_path:
             messagebox.showerror("Erro", "Selecione um vídeo primeiro!")
             return
 
+        if self.preparing is not None:
+            # 🔹 O preview abre sozinho quando o áudio estiver pronto; a janela segue livre
+            self.preview_requested = True
+            self.lbl_status.config(text="🔄 O preview abre assim que o áudio estiver pronto...")
+            return
+
+        from VideoPreview import VideoPreview
+
         # 🔥 Não destrua a janela, apenas esconda o frame
         self.main_frame.pack_forget()
 
         # Inicializa a preview passando callback para retornar
         self.preview = VideoPreview(
-            self.video_path, self.audio_path, self.root, voltar_callback=self.voltar_da_preview
+            self.video_path, self.root, voltar_callback=self.voltar_da_preview
         )
         self.preview.generate_preview()
 
@@ -95,4 +142,11 @@ if __name__ == "__main__":
     root.geometry("800x400")
     root.resizable(False, False)
     app = GapRemovalMain(root)
+
+    def report_startup():
+        print(f"🔹 Janela pronta em {1000 * (time.perf_counter() - STARTED):.0f} ms")
+        if "--startup-time" in sys.argv:
+            root.destroy()  # Só mede o tempo até a primeira janela
+
+    root.after_idle(report_startup)
     root.mainloop()
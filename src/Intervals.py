@@ -0,0 +1,157 @@
+import numpy as np
+
+
+def as_array(intervals):
+    """Lista de (início, fim) em segundos como array float64 (N, 2) ordenado por início"""
+    array = np.asarray(intervals, dtype=np.float64).reshape(-1, 2)
+    return array[np.argsort(array[:, 0], kind="stable")]
+
+
+def pad(intervals, before, after, duration=None):
+    """Estende cada intervalo mantido para não cortar o começo e o fim das falas"""
+    padded = intervals + np.array([-before, after])
+    return clip(padded, duration)
+
+
+def clip(intervals, duration=None):
+    """Limita os intervalos a [0, duração] e descarta os vazios"""
+    upper = np.inf if duration is None else duration
+    clipped = np.clip(intervals, 0.0, upper)
+    return clipped[clipped[:, 1] > clipped[:, 0]]
+
+
+def merge(intervals, max_gap=0.0):
+    """Une intervalos que se sobrepõem ou que ficam separados por menos de `max_gap` s"""
+    if len(intervals) < 2:
+        return intervals
+    starts, ends = intervals[:, 0], intervals[:, 1]
+    reach = np.maximum.accumulate(ends)
+    # 🔹 Novo grupo quando o início fica além do maior fim visto até ali + tolerância
+    new_group = np.concatenate(([True], starts[1:] > reach[:-1] + max_gap))
+    first = np.flatnonzero(new_group)
+    return np.column_stack((starts[first], np.maximum.reduceat(ends, first)))
+
+
+def drop_short(intervals, min_length):
+    """Remove os intervalos mantidos mais curtos que `min_length` s"""
+    return intervals[intervals[:, 1] - intervals[:, 0] >= min_length]
+
+
+def snap_to_frames(intervals, fps):
+    """Arredonda os limites para o frame mais próximo"""
+    return np.round(intervals * fps) / fps
+
+
+def snap_to_keyframes(intervals, keyframes):
+    """Leva o início de cada intervalo para o keyframe anterior (ou igual).
+
+    O fim não muda; com o início em um keyframe, o smart render copia desde o corte.
+    """
+    if len(keyframes) == 0:
+        return intervals
+    keyframes = np.asarray(keyframes, dtype=np.float64)
+    idx = np.searchsorted(keyframes, intervals[:, 0], side="right") - 1
+    starts = np.where(idx >= 0, keyframes[np.maximum(idx, 0)], intervals[:, 0])
+    return np.column_stack((starts, intervals[:, 1]))
+
+
+class IntervalProcessor:
+    """Pós-processamento dos intervalos mantidos entre a detecção e o corte.
+
+    Aplica, nesta ordem: descarte dos fragmentos curtos, folga em volta das falas,
+    alinhamento a frames (ou keyframes) e união de intervalos próximos. Cada fragmento
+    descartado ou unido é uma chamada a menos ao encoder.
+    """
+
+    def __init__(self, padding=0.1, merge_gap=0.3, min_keep=0.25, snap="frames"):
+        self.padding = padding  # s acrescentados antes e depois de cada trecho mantido
+        self.merge_gap = merge_gap  # Silêncios menores que isso (após a folga) são mantidos
+        self.min_keep = min_keep  # Trechos mantidos menores que isso são removidos
+        self.snap = snap  # "frames", "keyframes" ou None
+
+    def shape(self, intervals, duration=None, fps=None, keyframes=None):
+        """Passos que valem para cada intervalo isolado: descarte, folga e alinhamento"""
+        # 🔹 O tamanho mínimo vale para a fala detectada, antes de receber a folga
+        intervals = drop_short(intervals, self.min_keep)
+        if self.padding:
+            intervals = pad(intervals, self.padding, self.padding, duration)
+        if self.snap == "keyframes" and keyframes is not None:
+            intervals = snap_to_keyframes(intervals, keyframes)
+        elif self.snap in ("frames", "keyframes") and fps:
+            intervals = snap_to_frames(intervals, fps)
+        return clip(intervals, duration)
+
+    def apply(self, kept, duration=None, fps=None, keyframes=None):
+        """Devolve (intervalos processados, relatório com as contagens de cada passo)"""
+        intervals = as_array(kept)
+        report = {"input": len(intervals)}
+
+        intervals = self.shape(intervals, duration, fps, keyframes)
+        report["dropped"] = report["input"] - len(intervals)
+
+        before = len(intervals)
+        intervals = merge(intervals, self.merge_gap)
+        report["merged"] = before - len(intervals)
+
+        report["output"] = len(intervals)
+        report["removed"] = report["input"] - report["output"]
+        return [(float(start), float(end)) for start, end in intervals], report
+
+
+class IntervalStream:
+    """Versão incremental do IntervalProcessor para silêncios que chegam em ordem.
+
+    `push_silence` devolve os intervalos mantidos que já não podem mudar; o último fica
+    retido até se saber se o próximo vai se unir a ele. O resultado é o mesmo de
+    `IntervalProcessor.apply` sobre a lista completa.
+    """
+
+    def __init__(self, processor=None, duration=None, fps=None, keyframes=None):
+        self.processor = processor
+        self.duration = duration
+        self.fps = fps
+        self.keyframes = keyframes
+        self.report = {"input": 0, "dropped": 0, "merged": 0, "output": 0}
+        self._last_end = 0.0
+        self._held = None
+
+    def _push_kept(self, start, end):
+        self.report["input"] += 1
+        interval = np.array([[start, end]], dtype=np.float64)
+        merge_gap = 0.0
+        if self.processor:
+            interval = self.processor.shape(interval, self.duration, self.fps, self.keyframes)
+            merge_gap = self.processor.merge_gap
+        if not len(interval):
+            self.report["dropped"] += 1
+            return []
+
+        start, end = interval[0]
+        if self._held is not None and start <= self._held[1] + merge_gap:
+            self._held[1] = max(self._held[1], end)
+            self.report["merged"] += 1
+            return []
+        ready = [] if self._held is None else [tuple(self._held)]
+        self._held = [float(start), float(end)]
+        self.report["output"] += len(ready)
+        return ready
+
+    def push_silence(self, start, end):
+        """Recebe o próximo silêncio (s) e devolve os intervalos mantidos já finalizados"""
+        ready = []
+        if start > self._last_end:
+            ready = self._push_kept(self._last_end, start)
+        self._last_end = max(self._last_end, end)
+        return ready
+
+    def finish(self):
+        """Fecha o trecho depois do último silêncio e libera o intervalo retido"""
+        ready = []
+        if self.duration is not None and self.duration > self._last_end:
+            ready = self._push_kept(self._last_end, self.duration)
+        if self._held is not None:
+            ready.append(tuple(self._held))
+            self._held = None
+            self.report["output"] += 1
+        self.report["removed"] = self.report["input"] - self.report["output"]
+        return ready
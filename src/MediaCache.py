@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+from AudioStream import AudioStream
+from SilenceDetector import EnergyAccumulator, Envelope
+from Waveform import PeakAccumulator, PeakPyramid
+
+
+def default_cache_dir():
+    """Pasta de cache do usuário (pode ser trocada pela variável GAPREMOVAL_CACHE)"""
+    if os.environ.get("GAPREMOVAL_CACHE"):
+        return os.environ["GAPREMOVAL_CACHE"]
+    if os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "GapRemoval", "cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "gapremoval")
+
+
+def source_fingerprint(video_path):
+    """Identifica a versão de um arquivo pelo caminho, tamanho e data de modificação"""
+    stat = os.stat(video_path)
+    return {
+        "path": os.path.abspath(video_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+class MediaCache:
+    """Cache persistente de dados derivados de um vídeo, com limite de tamanho total.
+
+    Cada entrada é um grupo de arquivos com o mesmo nome-base (a chave); a remoção segue a
+    ordem do último acesso, que é registrada atualizando o mtime dos arquivos.
+
+    Envelopes e picos são abertos como memmap somente leitura: o preview e a exportação
+    do mesmo vídeo compartilham as páginas do arquivo em vez de cada um ter uma cópia.
+    """
+
+    DEFAULT_MAX_BYTES = 2 * 1024**3
+    ENVELOPE_VERSION = 2
+    PEAKS_VERSION = 2
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, video_path, kind, **params):
+        """Chave da entrada: impressão digital da fonte + tipo + parâmetros da análise"""
+        payload = {"source": source_fingerprint(video_path), "kind": kind, "params": params}
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return f"{kind}-{digest}"
+
+    def path(self, key, suffix):
+        return os.path.join(self.root, key + suffix)
+
+    def touch(self, key):
+        """Marca a entrada como usada agora (para a ordem de remoção)"""
+        for name in os.listdir(self.root):
+            if name.startswith(key):
+                os.utime(os.path.join(self.root, name))
+
+    def entries(self):
+        """Tamanho total e último acesso de cada entrada do cache"""
+        entries = {}
+        for name in os.listdir(self.root):
+            file_path = os.path.join(self.root, name)
+            if not os.path.isfile(file_path):
+                continue
+            key = name.split(".", 1)[0]
+            stat = os.stat(file_path)
+            size, last_used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+        return entries
+
+    def evict(self, keep=()):
+        """Apaga as entradas menos usadas até o cache caber em `max_bytes`"""
+        entries = self.entries()
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            for name in os.listdir(self.root):
+                if name.split(".", 1)[0] == key:
+                    try:
+                        os.remove(os.path.join(self.root, name))
+                    except OSError as e:
+                        print(f"⚠️ Não foi possível apagar {name} do cache. Erro: {e}")
+            total -= size
+
+    def envelope_key(self, video_path, sample_rate=AudioStream.SAMPLE_RATE):
+        return self.key(
+            video_path, "envelope", sample_rate=sample_rate, version=self.ENVELOPE_VERSION
+        )
+
+    def load_envelope(self, video_path, sample_rate=AudioStream.SAMPLE_RATE):
+        """Envelope salvo para esta versão do vídeo (memmap somente leitura), ou None"""
+        key = self.envelope_key(video_path, sample_rate)
+        meta_path = self.path(key, ".json")
+        data_path = self.path(key, ".energy")
+        if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+            return None
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            dtype = np.dtype(meta["dtype"])
+            if os.path.getsize(data_path) != meta["length"] * dtype.itemsize:
+                raise ValueError("tamanho do arquivo não confere")
+            energy = np.empty(0, dtype=dtype)
+            if meta["length"]:
+                energy = np.memmap(data_path, dtype=dtype, mode="r", shape=(meta["length"],))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Envelope em cache ilegível, recalculando. Erro: {e}")
+            return None
+
+        self.touch(key)
+        return Envelope(
+            energy, meta["sample_rate"], meta["channels"], meta["n_frames"], meta["sample_width"]
+        )
+
+    def _write_envelope_meta(self, key, envelope):
+        with open(self.path(key, ".json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "sample_rate": envelope.sample_rate,
+                    "channels": envelope.channels,
+                    "n_frames": envelope.n_frames,
+                    "sample_width": envelope.sample_width,
+                    "dtype": np.dtype(envelope.energy.dtype).str,
+                    "length": len(envelope.energy),
+                },
+                f,
+            )
+
+    @contextmanager
+    def envelope_writer(self, video_path, sample_rate=AudioStream.SAMPLE_RATE):
+        """EnergyAccumulator que grava a energia direto no arquivo do cache durante a leitura.
+
+        O .json só é escrito depois que os dados fecham, então uma leitura interrompida
+        deixa uma entrada que `load_envelope` ignora. O envelope final fica em
+        `accumulator.envelope`, já mapeado do arquivo; quem grava em `accumulator.sink`
+        por conta própria (a leitura em paralelo) coloca ali o envelope que montou.
+        """
+        key = self.envelope_key(video_path, sample_rate)
+        data_path = self.path(key, ".energy")
+        meta_path = self.path(key, ".json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        try:
+            with open(data_path, "wb") as sink:
+                accumulator = EnergyAccumulator(sample_rate, channels=1, sink=sink)
+                yield accumulator
+                envelope = accumulator.envelope
+                if envelope is None:
+                    envelope = accumulator.finish()
+        except BaseException:
+            try:
+                os.remove(data_path)
+            except OSError:
+                pass
+            raise
+        self._write_envelope_meta(key, envelope)
+        self.evict(keep=(key,))
+
+    def envelope(self, video_path, sample_rate=AudioStream.SAMPLE_RATE, workers=1, duration=None):
+        """Envelope do vídeo: do cache se possível, senão decodifica o áudio e salva.
+
+        Com `workers` > 1 e a duração conhecida, a decodificação é dividida em blocos
+        lidos por processos separados.
+        """
+        envelope = self.load_envelope(video_path, sample_rate)
+        if envelope is not None:
+            print("✅ Envelope de áudio carregado do cache.")
+            return envelope
+
+        stream = AudioStream(video_path, sample_rate=sample_rate)
+        # 🔹 Nos dois caminhos a energia vai direto para o arquivo, sem crescer na memória
+        with self.envelope_writer(video_path, sample_rate) as accumulator:
+            if workers > 1 and duration:
+                accumulator.envelope = stream.envelope_parallel(
+                    duration, workers, sink=accumulator.sink
+                )
+            else:
+                stream.analyze(accumulator)
+        return accumulator.envelope
+
+    def load_peaks(self, video_path, sample_rate=AudioStream.SAMPLE_RATE):
+        """Pirâmide de picos salva para esta versão do vídeo, ou None"""
+        key = self.key(video_path, "peaks", sample_rate=sample_rate, version=self.PEAKS_VERSION)
+        meta_path = self.path(key, ".json")
+        data_path = self.path(key, ".npy")
+        if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+            return None
+
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            peaks = np.load(data_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Forma de onda em cache ilegível, recalculando. Erro: {e}")
+            return None
+
+        self.touch(key)
+        return PeakPyramid(peaks[0], peaks[1], meta["bucket_seconds"])
+
+    def save_peaks(self, video_path, pyramid, sample_rate=AudioStream.SAMPLE_RATE):
+        """Grava só o nível mais fino (mín e máx); os outros são refeitos ao carregar"""
+        key = self.key(video_path, "peaks", sample_rate=sample_rate, version=self.PEAKS_VERSION)
+        np.save(self.path(key, ".npy"), np.stack(pyramid.levels[0]))
+        with open(self.path(key, ".json"), "w", encoding="utf-8") as f:
+            json.dump({"bucket_seconds": pyramid.bucket_seconds}, f)
+        self.evict(keep=(key,))
+
+    def waveform(self, video_path, sample_rate=AudioStream.SAMPLE_RATE):
+        """Pirâmide de picos do áudio: do cache, ou lida junto com o envelope em uma passada"""
+        pyramid = self.load_peaks(video_path, sample_rate)
+        if pyramid is not None:
+            return pyramid
+
+        peaks = PeakAccumulator(sample_rate)
+        stream = AudioStream(video_path, sample_rate=sample_rate)
+        if self.load_envelope(video_path, sample_rate) is None:
+            with self.envelope_writer(video_path, sample_rate) as energy:
+                stream.analyze(peaks, energy)
+        else:
+            stream.analyze(peaks)
+
+        pyramid = peaks.finish()
+        try:
+            self.save_peaks(video_path, pyramid, sample_rate)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar a forma de onda no cache. Erro: {e}")
+        return pyramid
+
+
+class SegmentCache(MediaCache):
+    """Trechos já codificados, reaproveitados quando a exportação é refeita.
+
+    A chave combina a impressão digital da fonte, os limites do intervalo e os parâmetros
+    de codificação; mudar o limiar só recodifica os intervalos que realmente mudaram.
+    Fica em uma subpasta própria, com limite de tamanho separado do cache de análise.
+    """
+
+    DEFAULT_MAX_BYTES = 20 * 1024**3
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(root or os.path.join(default_cache_dir(), "segments"), max_bytes)
+
+    def segment_key(self, video_path, start, end, settings):
+        return self.key(
+            video_path, "segment", start=round(start, 6), end=round(end, 6), settings=settings
+        )
+
+    def lookup(self, key):
+        """(caminho, codec) do trecho em cache, ou None"""
+        data_path = self.path(key, ".mp4")
+        meta_path = self.path(key, ".json")
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                codec = json.load(f)["codec"]
+        except (OSError, ValueError, KeyError):
+            return None
+        self.touch(key)
+        return data_path, codec
+
+    def store(self, key, file_path, codec):
+        """Move um trecho recém-codificado para o cache e devolve o novo caminho"""
+        data_path = self.path(key, ".mp4")
+        os.replace(file_path, data_path)
+        with open(self.path(key, ".json"), "w", encoding="utf-8") as f:
+            json.dump({"codec": codec}, f)
+        return data_path
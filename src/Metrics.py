@@ -0,0 +1,201 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+import ffmpeg
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def children_cpu_time():
+    """CPU (usuário + sistema) já consumida pelos processos filhos encerrados"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def process_io(pid):
+    """CPU e bytes lidos/escritos de um processo vivo (só Linux; senão None)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/io") as f:
+            io = dict(line.split(": ") for line in f.read().splitlines())
+    except (OSError, ValueError):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        "cpu_s": (int(fields[11]) + int(fields[12])) / ticks,
+        "bytes_read": int(io["rchar"]),
+        "bytes_written": int(io["wchar"]),
+    }
+
+
+class PipelineMetrics:
+    """Coleta tempos por etapa e por trecho e o progresso do ffmpeg durante uma exportação.
+
+    Cada medição vira um evento (dict com a chave "event") entregue aos observadores
+    registrados em `subscribe` e, opcionalmente, gravado como JSON lines em `trace_path`.
+    """
+
+    def __init__(self, trace_path=None):
+        self.started = time.perf_counter()
+        self.observers = []
+        self.stages = {}
+        self.segments = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+
+    def subscribe(self, observer):
+        """Registra uma função chamada como observer(evento) a cada medição"""
+        self.observers.append(observer)
+        return observer
+
+    def emit(self, event, **data):
+        data = {"event": event, "t": round(time.perf_counter() - self.started, 4), **data}
+        with self._lock:
+            if self._trace:
+                self._trace.write(json.dumps(data) + "\n")
+                self._trace.flush()
+        for observer in self.observers:
+            try:
+                observer(data)
+            except Exception as e:
+                print(f"⚠️ Observador de métricas falhou. Erro: {e}")
+        return data
+
+    @contextmanager
+    def stage(self, name, **info):
+        """Mede tempo de parede e CPU (deste processo e dos filhos) de uma etapa"""
+        self.emit("stage_start", stage=name, **info)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = children_cpu_time()
+        try:
+            yield
+        finally:
+            record = {
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.process_time() - cpu, 4),
+                "children_cpu_s": round(children_cpu_time() - children, 4),
+            }
+            self.stages[name] = record
+            self.emit("stage_end", stage=name, **record)
+
+    def segment_done(
+        self, idx, start, end, wall_s, done, total, usage=None, codec=None, cached=False
+    ):
+        """Registra um trecho codificado (usage vem de `process_io`, quando disponível)"""
+        record = {
+            "start": start,
+            "end": end,
+            "wall_s": round(wall_s, 4),
+            "codec": codec,
+            "cached": cached,
+        }
+        if usage:
+            record.update(usage)
+        self.segments[idx] = record
+        self.emit("segment_end", idx=idx, done=done, total=total, **record)
+
+    def add_bytes(self, read=0, written=0):
+        with self._lock:
+            self.bytes_read += read
+            self.bytes_written += written
+
+    def summary(self):
+        return {
+            "stages": self.stages,
+            "segments": self.segments,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+    def close(self):
+        self.emit("summary", **self.summary())
+        if self._trace:
+            self._trace.close()
+            self._trace = None
+
+
+def _progress_value(block, key, cast):
+    """Valor numérico de um campo do -progress ("N/A" e vazio viram 0)"""
+    value = block.get(key, "").rstrip("x")
+    try:
+        return cast(value)
+    except ValueError:
+        return cast(0)
+
+
+def limit_threads(stream, threads):
+    """Limita também as threads dos filtros de um comando do ffmpeg-python.
+
+    O `threads` de saída só vale para o encoder e o de entrada para o decoder: os grafos
+    de filtro (scale, format, trim, concat) têm opções globais próprias.
+    """
+    if not threads:
+        return stream
+    return stream.global_args(
+        "-filter_threads", str(threads), "-filter_complex_threads", str(threads)
+    )
+
+
+def run_ffmpeg(stream, metrics=None, label="ffmpeg", expected_duration=None):
+    """Executa um comando do ffmpeg-python lendo o `-progress pipe:1` linha a linha.
+
+    Emite eventos "progress" com frame, fps, speed e tempo de saída (e a fração concluída
+    quando `expected_duration` é conhecido). Devolve o uso de CPU/IO do processo quando o
+    sistema permite medir; levanta `ffmpeg.Error` se o ffmpeg falhar, como `.run()`.
+    """
+    args = stream.global_args("-progress", "pipe:1", "-nostats").compile(overwrite_output=True)
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # 🔹 O stderr é drenado em paralelo para o ffmpeg não travar com o pipe cheio
+    stderr_chunks = []
+    stderr_thread = threading.Thread(
+        target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+    )
+    stderr_thread.start()
+
+    usage = None
+    block = {}
+    for raw_line in process.stdout:
+        key, _, value = raw_line.decode(errors="replace").strip().partition("=")
+        if key != "progress":
+            block[key] = value
+            continue
+
+        if metrics:
+            event = {
+                "label": label,
+                "frame": _progress_value(block, "frame", int),
+                "fps": _progress_value(block, "fps", float),
+                "speed": _progress_value(block, "speed", float),
+                "out_time_s": _progress_value(block, "out_time_us", int) / 1_000_000,
+                "total_size": _progress_value(block, "total_size", int),
+            }
+            if expected_duration:
+                event["fraction"] = min(1.0, event["out_time_s"] / expected_duration)
+            metrics.emit("progress", **event)
+
+        if value == "end":
+            usage = process_io(process.pid)  # Lido antes do processo sair
+        block = {}
+
+    process.wait()
+    stderr_thread.join()
+    if process.returncode != 0:
+        raise ffmpeg.Error("ffmpeg", None, b"".join(stderr_chunks))
+
+    if metrics and usage:
+        metrics.add_bytes(read=usage["bytes_read"], written=usage["bytes_written"])
+    return usage
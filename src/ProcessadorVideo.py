@@ -1,137 +1,497 @@
 import ffmpeg
 import os
-import subprocess
-from pydub import AudioSegment, silence
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from AudioStream import AudioStream
+from Calibration import Calibration
+from CutList import CutList
+from EncoderRegistry import default_registry
+from Intervals import IntervalProcessor, IntervalStream
+from MediaCache import MediaCache
+from Metrics import PipelineMetrics, limit_threads, run_ffmpeg
+from SilenceDetector import StreamingSilenceDetector
+from SmartRender import SmartRender
 
 
 class ProcessadorVideo:
-    def __init__(self, video_path, silence_threshold, output_path):
+    # 🔹 Acima disso o grafo não cabe com folga na linha de comando (limite do Windows: 32767)
+    MAX_FILTER_GRAPH_LEN = 24000
+
+    def __init__(
+        self,
+        video_path,
+        silence_threshold,
+        output_path,
+        export_mode="graph",
+        workers=None,
+        thread_budget=None,
+        progress_callback=None,
+        min_silence_len=700,
+        temp_folder=None,
+        metrics=None,
+        detection_workers=1,
+        segment_cache=None,
+        encoder=None,
+        cut_list=None,
+        interval_processor=None,
+    ):
         self.video_path = video_path
-        self.silence_threshold = int(silence_threshold)
+        # 🔹 "auto": o limiar sai do histograma de volume na primeira leitura do áudio
+        self.silence_threshold = (
+            silence_threshold if silence_threshold == "auto" else int(silence_threshold)
+        )
         self.output_path = output_path
-        self.min_silence_len = 700
-        self.temp_folder = "temp_parts"
-
-        # Detecta o melhor codec para GPU disponível
-        self.codec = self.get_gpu_codec()
+        self.min_silence_len = int(min_silence_len)
+        # 🔹 Sem pasta informada, cada exportação cria (e apaga no fim) a sua própria
+        self._owns_temp_folder = temp_folder is None
+        self.temp_folder = temp_folder
+        # Processos usados para decodificar e analisar o áudio em blocos
+        self.detection_workers = detection_workers
+        # 🔹 SegmentCache opcional: reexportações só codificam os intervalos novos
+        self.segment_cache = segment_cache
+        self.segment_codecs = set()
+        # "graph": um único ffmpeg com trim/concat; "segments": um ffmpeg por trecho + concat;
+        # "smart": copia os GOPs inteiros e recodifica só as bordas dos cortes;
+        # "stream": como "segments", mas codifica cada trecho enquanto o áudio ainda é analisado
+        self.export_mode = export_mode
+        self._duration = None
+        # 🔹 CutList já calculada (preview, outra máquina): pula toda a etapa de áudio
+        self.cut_list = cut_list
+        # 🔹 Folga, união e descarte de fragmentos antes de codificar (None desliga)
+        self.interval_processor = (
+            IntervalProcessor() if interval_processor is None else interval_processor
+        )
+        self._fps = None
 
-    def get_gpu_codec(self):
-        """Detecta a GPU disponível e retorna o codec de vídeo e áudio correspondente"""
-        try:
-            output = subprocess.check_output(
-                "ffmpeg -hide_banner -encoders", shell=True, text=True
-            )
+        # 🔹 Pool de segmentos: o orçamento global de threads é dividido entre os workers
+        self.thread_budget = thread_budget or os.cpu_count() or 2
+        self.workers = max(1, min(workers or self.thread_budget // 4, self.thread_budget))
+        self.threads_per_worker = max(1, self.thread_budget // self.workers)
+        # Chamado como progress_callback(concluidos, total, idx, arquivo) a cada trecho
+        self.progress_callback = progress_callback
+        # 🔹 Tempos por etapa/trecho e progresso do ffmpeg (observadores e trace JSON lines)
+        self.metrics = metrics or PipelineMetrics()
 
-            if "h264_nvenc" in output:
-                return {"video": "h264_nvenc", "audio": "aac", "gpu": "NVIDIA"}
-            elif "h264_amf" in output:
-                return {"video": "h264_amf", "audio": "aac", "gpu": "AMD"}
-            elif "h264_qsv" in output:
-                return {"video": "h264_qsv", "audio": "aac", "gpu": "Intel"}
-            else:
-                return {"video": "libx264", "audio": "aac", "gpu": "CPU (fallback)"}
-        except Exception:
-            return {"video": "libx264", "audio": "aac", "gpu": "CPU (fallback)"}
+        # 🔹 EncoderSession: melhor encoder testado na máquina, com troca para libx264 na
+        # primeira falha real (vale para todos os trechos restantes do job)
+        self.encoder = encoder or default_registry().session()
 
     def detect_silence(self):
-        """Extrai o áudio e detecta os trechos silenciosos"""
-        audio_path = "temp_audio.wav"
-        ffmpeg.input(self.video_path).output(audio_path, format="wav").run(
-            overwrite_output=True
+        """Lê o envelope do áudio (cache ou ffmpeg) e detecta os trechos silenciosos"""
+        if self.cut_list is not None:
+            if self.cut_list.matches(self.video_path):
+                print(f"✅ Usando a lista de cortes pronta ({len(self.cut_list.silent_parts)} silêncios).")
+                if self.cut_list.duration is not None:
+                    self._duration = self.cut_list.duration
+                return list(self.cut_list.silent_parts)
+            print("⚠️ A lista de cortes é de outro vídeo ou de outra versão dele. Analisando o áudio...")
+
+        envelope = MediaCache().envelope(
+            self.video_path,
+            workers=self.detection_workers,
+            duration=self.get_duration() if self.detection_workers > 1 else None,
         )
-
-        audio = AudioSegment.from_file(audio_path, format="wav")
-        os.remove(audio_path)
-
-        silent_parts = silence.detect_silence(
-            audio,
+        if self.silence_threshold == "auto":
+            calibration = Calibration(envelope, self.min_silence_len)
+            self.silence_threshold = calibration.suggested_threshold
+            print(
+                f"🔹 Limiar automático: {self.silence_threshold} dB "
+                f"(ruído ~{calibration.noise_floor:.0f} dB, fala ~{calibration.speech_level:.0f} dB)"
+            )
+        silent_parts = envelope.detect_silence(
             min_silence_len=self.min_silence_len,
             silence_thresh=self.silence_threshold,
         )
         return [(start / 1000, end / 1000) for start, end in silent_parts]
 
-    def cut_video(self, silent_parts):
-        """Corta o vídeo removendo as partes silenciosas"""
-        os.makedirs(self.temp_folder, exist_ok=True)
-        input_video = ffmpeg.input(self.video_path)
-        last_end = 0
-        cut_files = []
+    def build_cut_list(self):
+        """Detecta os silêncios e devolve uma CutList para exportar em outro momento/máquina"""
+        return CutList.from_video(
+            self.video_path,
+            self.detect_silence(),
+            duration=self.get_duration(),
+            fps=self.get_fps() or 30,
+            silence_threshold=self.silence_threshold,
+            min_silence_len=self.min_silence_len,
+        )
+
+    def get_duration(self):
+        """Duração do vídeo de entrada em segundos (None se o ffprobe falhar)"""
+        if self._duration is None:
+            try:
+                self._duration = float(ffmpeg.probe(self.video_path)["format"]["duration"])
+            except Exception as e:
+                print(f"⚠️ Não foi possível obter a duração do vídeo. Erro: {e}")
+        return self._duration
+
+    def get_fps(self):
+        """Frame rate do vídeo de entrada (None se o ffprobe falhar)"""
+        if self._fps is None:
+            try:
+                stream = ffmpeg.probe(self.video_path, select_streams="v:0")["streams"][0]
+                num, _, den = stream["avg_frame_rate"].partition("/")
+                self._fps = float(num) / float(den or 1) if float(num) else None
+            except Exception as e:
+                print(f"⚠️ Não foi possível obter o frame rate do vídeo. Erro: {e}")
+        return self._fps
+
+    def plan_intervals(self, silent_parts):
+        """Intervalos mantidos já pós-processados (folga, fragmentos, frames/keyframes)"""
+        kept = self.kept_intervals(silent_parts)
+        if not self.interval_processor or not kept:
+            return kept
+
+        kept, report = self.interval_processor.apply(
+            kept, self.get_duration(), self.get_fps(), self.snap_keyframes()
+        )
+        self.report_intervals(report)
+        return kept
+
+    def snap_keyframes(self):
+        """Keyframes da fonte quando o pós-processamento alinha os cortes a eles"""
+        if not self.interval_processor or self.interval_processor.snap != "keyframes":
+            return None
+        try:
+            return SmartRender(self.video_path, self.temp_folder).keyframe_index()
+        except Exception as e:
+            print(f"⚠️ Não foi possível ler os keyframes, alinhando a frames. Erro: {e}")
+            return None
+
+    def report_intervals(self, report):
+        print(
+            f"🔹 Intervalos: {report['input']} → {report['output']} "
+            f"({report['merged']} unidos, {report['dropped']} fragmentos descartados)"
+        )
+        self.metrics.emit("intervals", **report)
 
-        for idx, (start, end) in enumerate(silent_parts):
+    def kept_intervals(self, silent_parts):
+        """Converte os trechos silenciosos nos intervalos (início, fim) que serão mantidos"""
+        kept = []
+        last_end = 0
+        for start, end in silent_parts:
             if start > last_end:
-                output_part = os.path.join(self.temp_folder, f"part_{idx}.mp4")
-                trimmed_video = (
-                    input_video.trim(start=last_end, end=start)
-                    .setpts("PTS-STARTPTS")
-                    .filter(
-                        "scale", "trunc(iw/2)*2", "trunc(ih/2)*2"
-                    )  # 🔹 Ajusta resolução
-                    .filter("format", "yuv420p")  # 🔹 Força conversão para 8 bits
+                kept.append((last_end, start))
+            last_end = end
+
+        # 🔹 O trecho depois do último silêncio também faz parte do vídeo final
+        duration = self.get_duration()
+        if duration is not None and duration > last_end:
+            kept.append((last_end, duration))
+        return kept
+
+    def build_single_pass(self, kept, codec_video):
+        """Monta um único grafo trim/atrim + concat que decodifica e codifica o vídeo uma vez"""
+        # 🔹 Decoder, filtros e encoder respeitam a fatia do orçamento global deste job
+        input_video = ffmpeg.input(self.video_path, threads=self.thread_budget)
+        streams = []
+        for start, end in kept:
+            streams.append(
+                input_video.video.trim(start=start, end=end).setpts("PTS-STARTPTS")
+            )
+            streams.append(
+                input_video.audio.filter_("atrim", start=start, end=end).filter_(
+                    "asetpts", "PTS-STARTPTS"
                 )
-                trimmed_audio = input_video.filter_(
-                    "atrim", start=last_end, end=start
-                ).filter_("asetpts", "PTS-STARTPTS")
-
-                codec_video = self.codec["video"]
-
-                # Parâmetros NVENC
-                codec_args = {
-                    "rc": "vbr_hq",
-                    "cq": 19,
-                    "preset": "slow",
-                    "bf": 2,
-                    "g": 60,
-                    "maxrate": "50M",
-                    "bufsize": "25M",
-                }
+            )
 
-                try:
-                    # 🔥 Primeiro tenta NVENC
-                    ffmpeg.output(
-                        trimmed_video,
-                        trimmed_audio,
-                        output_part,
-                        vcodec=codec_video,
-                        acodec=self.codec["audio"],
-                        **codec_args,
-                        threads=2,
-                    ).run(overwrite_output=True)
-                    cut_files.append(output_part)
-                    print(f"✅ Trecho {idx} salvo com NVENC: {output_part}")
+        joined = ffmpeg.concat(*streams, v=1, a=1).node
+        video = (
+            joined[0]
+            .filter("scale", "trunc(iw/2)*2", "trunc(ih/2)*2")  # 🔹 Ajusta resolução
+            .filter("format", "yuv420p")  # 🔹 Força conversão para 8 bits
+        )
+        output = ffmpeg.output(
+            video,
+            joined[1],
+            self.output_path,
+            vcodec=codec_video,
+            acodec=self.encoder.audio,
+            threads=self.thread_budget,
+            **self.encoder.args(codec_video),
+        )
+        return limit_threads(output, self.thread_budget)
+
+    def render_single_pass(self, kept):
+        """Exporta todos os intervalos mantidos com uma só chamada ao ffmpeg.
+
+        Retorna False quando o grafo fica grande demais ou quando todos os codecs falham,
+        para que o pipeline volte ao modo por segmentos.
+        """
+        if not kept:
+            return False
+
+        graph = self.build_single_pass(kept, self.encoder.video)
+        graph_len = sum(len(arg) for arg in graph.get_args())
+        if graph_len > self.MAX_FILTER_GRAPH_LEN:
+            print(
+                f"⚠️ Grafo com {len(kept)} trechos ({graph_len} caracteres) é grande demais. "
+                "Usando exportação por segmentos..."
+            )
+            return False
 
-                except Exception as e:
-                    print(f"⚠️ NVENC falhou no trecho {idx}. Erro: {e}")
-                    print("🔄 Tentando novamente com libx264...")
+        for codec_video in self.encoder.candidates():
+            try:
+                run_ffmpeg(
+                    self.build_single_pass(kept, codec_video),
+                    self.metrics,
+                    label="single_pass",
+                    expected_duration=sum(end - start for start, end in kept),
+                )
+                print(f"✅ Vídeo final gerado em uma passada com {codec_video}: {self.output_path}")
+                return True
+            except Exception as e:
+                print(f"⚠️ Exportação em uma passada falhou com {codec_video}. Erro: {e}")
+                self.encoder.report_failure(codec_video, e)
+
+        print("🔄 Tentando novamente com exportação por segmentos...")
+        return False
+
+    def encoder_settings(self):
+        """Tudo o que muda o resultado de um trecho codificado (parte da chave do cache)"""
+        # 🔹 Usa o encoder do início do job: a troca por falha não invalida o cache
+        codecs = list(dict.fromkeys([self.encoder.preferred, "libx264"]))
+        return {
+            "codecs": codecs,
+            "args": {codec: self.encoder.args(codec) for codec in codecs},
+            "audio": self.encoder.audio,
+            "filters": "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p",
+        }
 
-                    # 🔥 Fallback para libx264 caso NVENC falhe
-                    try:
+    def encode_segment(self, idx, start, end):
+        """Codifica um trecho mantido; tenta o codec da GPU e depois libx264.
+
+        Retorna um dict com o caminho do arquivo gerado (None se os dois codecs falharem),
+        o codec usado, o tempo de parede, o uso de CPU/IO do ffmpeg e se veio do cache.
+        """
+        started = time.perf_counter()
+        result = {"path": None, "codec": None, "usage": None, "cached": False, "key": None}
+        output_part = os.path.join(self.temp_folder, f"part_{idx}.mp4")
+
+        if self.segment_cache:
+            result["key"] = self.segment_cache.segment_key(
+                self.video_path, start, end, self.encoder_settings()
+            )
+            hit = self.segment_cache.lookup(result["key"])
+            if hit:
+                result.update(path=hit[0], codec=hit[1], cached=True)
+                result["wall_s"] = time.perf_counter() - started
+                print(f"♻️ Trecho {idx} reaproveitado do cache")
+                return result
+            output_part = self.segment_cache.path(result["key"], ".tmp.mp4")
+
+        input_video = ffmpeg.input(self.video_path, threads=self.threads_per_worker)
+        trimmed_video = (
+            input_video.trim(start=start, end=end)
+            .setpts("PTS-STARTPTS")
+            .filter("scale", "trunc(iw/2)*2", "trunc(ih/2)*2")  # 🔹 Ajusta resolução
+            .filter("format", "yuv420p")  # 🔹 Força conversão para 8 bits
+        )
+        trimmed_audio = input_video.filter_("atrim", start=start, end=end).filter_(
+            "asetpts", "PTS-STARTPTS"
+        )
+
+        # 🔥 Primeiro tenta o codec da GPU, depois o fallback para libx264
+        for codec_video in self.encoder.candidates():
+            try:
+                result["usage"] = run_ffmpeg(
+                    limit_threads(
                         ffmpeg.output(
                             trimmed_video,
                             trimmed_audio,
                             output_part,
-                            vcodec="libx264",
-                            acodec=self.codec["audio"],
-                            crf=16,
-                            preset="slow",
-                            bf=2,
-                            g=60,
-                            threads=2,
-                        ).run(overwrite_output=True)
-                        cut_files.append(output_part)
-                        print(f"✅ Trecho {idx} salvo com libx264: {output_part}")
-
-                    except Exception as e:
-                        print(
-                            f"❌ Erro ao processar trecho {idx}, ignorando. Erro: {e}"
-                        )
+                            vcodec=codec_video,
+                            acodec=self.encoder.audio,
+                            **self.encoder.args(codec_video),
+                            threads=self.threads_per_worker,
+                        ),
+                        self.threads_per_worker,
+                    ),
+                    self.metrics,
+                    label=f"segment_{idx}",
+                    expected_duration=end - start,
+                )
+                if self.segment_cache:
+                    output_part = self.segment_cache.store(result["key"], output_part, codec_video)
+                result.update(path=output_part, codec=codec_video)
+                print(f"✅ Trecho {idx} salvo com {codec_video}: {output_part}")
+                break
 
-            last_end = end
+            except Exception as e:
+                print(f"⚠️ {codec_video} falhou no trecho {idx}. Erro: {e}")
+                self.encoder.report_failure(codec_video, e)
+        else:
+            print(f"❌ Erro ao processar trecho {idx}, ignorando.")
 
-        return cut_files
+        result["wall_s"] = time.perf_counter() - started
+        return result
 
-    def concatenate_videos(self, part_files):
-        """Concatena os segmentos do vídeo sem os trechos silenciosos"""
-        file_list_path = "file_list.txt"
+    def cut_video(self, silent_parts, kept=None):
+        """Corta o vídeo removendo as partes silenciosas.
+
+        Os trechos são codificados em paralelo por `self.workers` processos do ffmpeg e
+        podem terminar em qualquer ordem; a lista devolvida segue a ordem da timeline.
+        """
+        os.makedirs(self.temp_folder, exist_ok=True)
+        if kept is None:
+            kept = self.plan_intervals(silent_parts)
+        results = [None] * len(kept)
+        self.segment_codecs = set()
+        cache_keys = set()
+        print(
+            f"🔹 Codificando {len(kept)} trechos com {self.workers} workers "
+            f"({self.threads_per_worker} threads cada)"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self.encode_segment, idx, start, end): idx
+                for idx, (start, end) in enumerate(kept)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                idx = futures[future]
+                segment = future.result()
+                results[idx] = segment["path"]
+                self.segment_finished(idx, kept[idx], segment, done, len(kept), cache_keys)
+
+        if self.segment_cache:
+            # 🔹 Os trechos deste job nunca são expulsos enquanto ele ainda precisa deles
+            self.segment_cache.evict(keep=cache_keys)
+        return [part for part in results if part]
+
+    def segment_finished(self, idx, interval, segment, done, total, cache_keys):
+        """Registra um trecho concluído: codec, chave do cache, métricas e progresso"""
+        if segment["path"]:
+            self.segment_codecs.add(segment["codec"])
+            cache_keys.add(segment["key"])
+        self.metrics.segment_done(
+            idx,
+            *interval,
+            segment["wall_s"],
+            done,
+            total,
+            usage=segment["usage"],
+            codec=segment["codec"],
+            cached=segment["cached"],
+        )
+        if self.progress_callback:
+            self.progress_callback(done, total, idx, segment["path"])
+
+    def stream_silences(self):
+        """Gera os silêncios (s), em ordem, assim que ficam definitivos.
+
+        Com uma lista de cortes válida ou o envelope em cache eles saem todos de uma vez;
+        senão o áudio é lido do ffmpeg e cada trecho sai quando a janela seguinte fecha.
+        """
+        cache = MediaCache()
+        reuse = self.cut_list is not None and self.cut_list.matches(self.video_path)
+        # 🔹 O limiar automático precisa do histograma do áudio inteiro antes de detectar
+        if reuse or self.silence_threshold == "auto" or cache.load_envelope(self.video_path) is not None:
+            yield from self.detect_silence()
+            return
+
+        stream = AudioStream(self.video_path)
+        # 🔹 O envelope é gravado no cache durante a detecção; o preview reabre o mesmo arquivo
+        with cache.envelope_writer(self.video_path, stream.sample_rate) as accumulator:
+            detector = StreamingSilenceDetector(
+                stream.sample_rate,
+                self.min_silence_len,
+                self.silence_threshold,
+                accumulator=accumulator,
+            )
+            for chunk in stream.chunks():
+                for start, end in detector.feed(chunk):
+                    yield start / 1000, end / 1000
+            for start, end in detector.finish():
+                yield start / 1000, end / 1000
+
+    def stream_video(self):
+        """Detecta e codifica ao mesmo tempo, sem esperar a análise do áudio inteiro.
+
+        Cada intervalo mantido entra na fila dos workers assim que fica definitivo. A fila
+        tem no máximo dois trechos por worker: se a codificação ficar para trás, a leitura
+        do áudio espera. Retorna None quando não há silêncio (nada é codificado).
+        """
+        os.makedirs(self.temp_folder, exist_ok=True)
+        self.segment_codecs = set()
+        cache_keys = set()
+        planner = IntervalStream(
+            self.interval_processor or None,
+            self.get_duration(),
+            self.get_fps(),
+            self.snap_keyframes(),
+        )
+        jobs = queue.Queue(maxsize=2 * self.workers)
+        lock = threading.Lock()
+        intervals = []
+        results = {}
+
+        def worker():
+            while True:
+                item = jobs.get()
+                if item is None:
+                    return
+                idx, start, end = item
+                try:
+                    segment = self.encode_segment(idx, start, end)
+                except Exception as e:
+                    # 🔹 Um worker que morresse deixaria a fila cheia e a análise travada
+                    print(f"❌ Erro ao processar trecho {idx}. Detalhes: {e}")
+                    segment = {
+                        "path": None, "codec": None, "usage": None,
+                        "cached": False, "key": None, "wall_s": 0.0,
+                    }
+                with lock:
+                    results[idx] = segment["path"]
+                    done, total = len(results), len(intervals)
+                    self.segment_finished(idx, (start, end), segment, done, total, cache_keys)
+
+        def submit(ready):
+            for start, end in ready:
+                with lock:
+                    idx = len(intervals)
+                    intervals.append((start, end))
+                jobs.put((idx, start, end))  # 🔹 Bloqueia enquanto a fila estiver cheia
+
+        print(
+            f"🔹 Analisando e codificando em paralelo com {self.workers} workers "
+            f"({self.threads_per_worker} threads cada)"
+        )
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        found_silence = False
+        try:
+            with self.metrics.stage("detect_silence"):
+                for start, end in self.stream_silences():
+                    found_silence = True
+                    submit(planner.push_silence(start, end))
+            if found_silence:
+                submit(planner.finish())
+                self.report_intervals(planner.report)
+        finally:
+            for _ in threads:
+                jobs.put(None)
+            for thread in threads:
+                thread.join()
+
+        if self.segment_cache:
+            self.segment_cache.evict(keep=cache_keys)
+        if not found_silence:
+            return None
+        return [results[idx] for idx in range(len(intervals)) if results.get(idx)]
+
+    def concatenate_videos(self, part_files, stream_copy=False):
+        """Concatena os segmentos do vídeo sem os trechos silenciosos.
+
+        Com `stream_copy` (todos os trechos com o mesmo codec) tenta primeiro juntar com
+        `-c copy`, sem recodificar.
+        """
+        file_list_path = os.path.join(self.temp_folder, "file_list.txt")
 
         valid_files = [
             file
@@ -147,69 +507,113 @@ class ProcessadorVideo:
             for part in valid_files:
                 f.write(f"file '{os.path.abspath(part)}'\n")
 
-        codec_video = self.codec["video"]
-
-        codec_args = {
-            "rc": "vbr_hq",
-            "cq": 19,
-            "preset": "slow",
-            "bf": 2,
-            "g": 60,
-            "maxrate": "50M",
-            "bufsize": "25M",
-        }
-
-        try:
-            print("🔹 Tentando concatenar com NVENC...")
-            ffmpeg.input(file_list_path, format="concat", safe=0).output(
-                self.output_path,
-                vcodec=codec_video,
-                acodec="aac",
-                **codec_args,
-                threads=2,
-            ).run(overwrite_output=True)
-
-            print(f"✅ Vídeo final gerado com sucesso com NVENC: {self.output_path}")
-
-        except Exception as e:
-            print(f"⚠️ NVENC falhou na concatenação. Erro: {e}")
-            print("🔄 Tentando novamente com libx264...")
+        if stream_copy:
+            try:
+                run_ffmpeg(
+                    ffmpeg.input(file_list_path, format="concat", safe=0).output(
+                        self.output_path, c="copy"
+                    ),
+                    self.metrics,
+                    label="concat",
+                )
+                print(f"✅ Vídeo final gerado sem recodificar: {self.output_path}")
+                os.remove(file_list_path)
+                return
+            except Exception as e:
+                print(f"⚠️ Concatenação por cópia falhou, recodificando. Erro: {e}")
 
+        for codec_video in self.encoder.candidates():
             try:
-                ffmpeg.input(file_list_path, format="concat", safe=0).output(
-                    self.output_path,
-                    vcodec="libx264",
-                    acodec="aac",
-                    crf=16,
-                    preset="slow",
-                    bf=2,
-                    g=60,
-                    threads=2,
-                ).run(overwrite_output=True)
-
-                print(
-                    f"✅ Vídeo final gerado com sucesso com libx264: {self.output_path}"
+                print(f"🔹 Concatenando com {codec_video}...")
+                run_ffmpeg(
+                    limit_threads(
+                        ffmpeg.input(
+                            file_list_path, format="concat", safe=0, threads=self.thread_budget
+                        ).output(
+                            self.output_path,
+                            vcodec=codec_video,
+                            acodec=self.encoder.audio,
+                            **self.encoder.args(codec_video),
+                            threads=self.thread_budget,
+                        ),
+                        self.thread_budget,
+                    ),
+                    self.metrics,
+                    label="concat",
                 )
+                print(f"✅ Vídeo final gerado com sucesso com {codec_video}: {self.output_path}")
+                break
 
             except Exception as e:
-                print(f"❌ Erro na concatenação. Detalhes: {e}")
+                print(f"⚠️ {codec_video} falhou na concatenação. Erro: {e}")
+                self.encoder.report_failure(codec_video, e)
+        else:
+            print("❌ Erro na concatenação com todos os encoders.")
 
         os.remove(file_list_path)
 
     def remove_silence(self):
         """Pipeline completo"""
-        silent_parts = self.detect_silence()
+        if self._owns_temp_folder:
+            self.temp_folder = tempfile.mkdtemp(prefix="gapremoval_")
+        try:
+            self._remove_silence()
+        finally:
+            self.metrics.close()
+            if self._owns_temp_folder:
+                shutil.rmtree(self.temp_folder, ignore_errors=True)
+
+    def _remove_silence(self):
+        if self.export_mode == "stream":
+            with self.metrics.stage("stream_video"):
+                cut_files = self.stream_video()
+            if cut_files is None:
+                print("Nenhuma parte silenciosa detectada. O vídeo permanecerá inalterado.")
+                shutil.copyfile(self.video_path, self.output_path)
+                return
+            self.finish_segments(cut_files)
+            return
+
+        with self.metrics.stage("detect_silence"):
+            silent_parts = self.detect_silence()
 
         if not silent_parts:
             print("Nenhuma parte silenciosa detectada. O vídeo permanecerá inalterado.")
-            os.rename(self.video_path, self.output_path)
+            shutil.copyfile(self.video_path, self.output_path)
             return
 
-        cut_files = self.cut_video(silent_parts)
-        self.concatenate_videos(cut_files)
-
-        # Limpar arquivos temporários
+        kept = self.plan_intervals(silent_parts)
+        if self.export_mode == "smart":
+            with self.metrics.stage("smart_render", intervals=len(kept)):
+                rendered = SmartRender(
+                    self.video_path,
+                    self.temp_folder,
+                    metrics=self.metrics,
+                    threads=self.thread_budget,
+                ).render(kept, self.output_path)
+            if rendered:
+                return
+
+        if self.export_mode in ("graph", "smart"):
+            with self.metrics.stage("single_pass", intervals=len(kept)):
+                rendered = self.render_single_pass(kept)
+            if rendered:
+                return
+
+        with self.metrics.stage("cut_video", intervals=len(kept)):
+            cut_files = self.cut_video(silent_parts, kept)
+        self.finish_segments(cut_files)
+
+    def finish_segments(self, cut_files):
+        """Concatena os trechos codificados e apaga os temporários"""
+        with self.metrics.stage("concatenate_videos", segments=len(cut_files)):
+            self.concatenate_videos(cut_files, stream_copy=len(self.segment_codecs) == 1)
+
+        # Limpar arquivos temporários (os trechos do SegmentCache ficam)
+        temp_folder = os.path.abspath(self.temp_folder)
         for file in cut_files:
+            if os.path.dirname(os.path.abspath(file)) != temp_folder:
+                continue
             try:
                 os.remove(file)
             except Exception as e:
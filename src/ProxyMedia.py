@@ -0,0 +1,101 @@
+import os
+import threading
+
+import ffmpeg
+
+from MediaCache import MediaCache
+
+
+class ProxyMedia:
+    """Cópia de baixa resolução do vídeo, usada só para navegar no preview.
+
+    O proxy é um H.264 640x360 com GOP curto e sem B-frames, então qualquer seek decodifica
+    no máximo alguns quadros pequenos. Fica no mesmo cache do envelope de áudio e é
+    reaproveitado enquanto o arquivo original não mudar; a exportação usa sempre o original.
+    """
+
+    PROXY_VERSION = 1
+
+    def __init__(self, video_path, cache=None, size=(640, 360), gop=12):
+        self.video_path = video_path
+        self.cache = cache or MediaCache()
+        self.size = size
+        self.gop = gop
+        self.key = self.cache.key(
+            video_path, "proxy", size=list(size), gop=gop, version=self.PROXY_VERSION
+        )
+        self.path = self.cache.path(self.key, ".mkv")
+        self._thread = None
+        self._process = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def exists(self):
+        """True se o proxy já foi gerado (e marca o uso para o LRU do cache)"""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self.cache.touch(self.key)
+            return True
+        return False
+
+    def generate(self):
+        """Transcodifica o proxy; escreve em um arquivo temporário e renomeia ao final.
+
+        Devolve None se a geração foi interrompida por `cancel()`.
+        """
+        temp_path = self.cache.path(self.key, ".tmp.mkv")
+        width, height = self.size
+        stream = (
+            ffmpeg.input(self.video_path)
+            .video.filter("scale", width, height)
+            .output(
+                temp_path,
+                vcodec="libx264",
+                preset="veryfast",
+                tune="fastdecode",
+                crf=28,
+                g=self.gop,
+                bf=0,
+                pix_fmt="yuv420p",
+                fps_mode="passthrough",
+            )
+            .overwrite_output()
+        )
+        with self._lock:
+            if self._cancelled.is_set():
+                return None
+            self._process = stream.run_async(pipe_stdout=True, pipe_stderr=True)
+        out, err = self._process.communicate()
+        if self._cancelled.is_set():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        if self._process.returncode != 0:
+            raise ffmpeg.Error("ffmpeg", out, err)
+        os.replace(temp_path, self.path)
+        self.cache.evict(keep=(self.key,))
+        return self.path
+
+    def generate_async(self, on_ready):
+        """Gera o proxy em segundo plano e chama on_ready(caminho) quando terminar"""
+
+        def run():
+            try:
+                path = self.generate()
+                if path is None:
+                    print("🔹 Geração do proxy do preview cancelada.")
+                    return
+                on_ready(path)
+                print(f"✅ Proxy do preview pronto: {self.path}")
+            except Exception as e:
+                print(f"⚠️ Não foi possível gerar o proxy do preview. Erro: {e}")
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def cancel(self):
+        """Interrompe a geração em segundo plano (ex.: o preview foi fechado antes do fim)"""
+        with self._lock:
+            self._cancelled.set()
+            if self._process is not None and self._process.poll() is None:
+                self._process.kill()
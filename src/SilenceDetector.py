@@ -0,0 +1,364 @@
+import math
+
+import numpy as np
+
+
+def db_to_float(db):
+    """Converte um valor em dBFS para a razão de amplitude correspondente"""
+    return 10 ** (db / 20)
+
+
+def ms_boundaries(ms, sample_rate):
+    """Índice do frame em que cada milissegundo começa (mesma conta do pydub)"""
+    return (np.asarray(ms, dtype=np.float64) * (sample_rate / 1000.0)).astype(np.int64)
+
+
+def duration_ms(n_frames, sample_rate):
+    """Duração em milissegundos, arredondada como `len(AudioSegment)`"""
+    return round(1000 * (n_frames / sample_rate))
+
+
+class EnergyAccumulator:
+    """Acumula a energia (soma dos quadrados) de cada milissegundo a partir de blocos de PCM.
+
+    Os blocos podem ter qualquer tamanho; cada chamada de `feed` devolve a energia dos
+    milissegundos que ficaram completos com aquele bloco. Com `sink` (arquivo binário
+    aberto para escrita) a energia fechada vai direto para o disco e `finish` devolve o
+    envelope mapeado em memória, então a memória usada não cresce com a duração.
+    """
+
+    def __init__(self, sample_rate, channels=1, sink=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sink = sink
+        self.dtype = np.dtype(np.int64)
+        self.envelope = None
+        self._closed_count = 0
+        self.frames_seen = 0
+        self._total = 0  # Energia acumulada de todos os frames recebidos
+        self._closed_cum = 0  # Energia acumulada até o último limite de ms fechado
+        self._next_ms = 1
+        self._parts = []
+
+    def _last_closed_ms(self, frames):
+        """Maior milissegundo k cujo limite int(k * sr / 1000) já foi recebido"""
+        k = int(frames * 1000 // self.sample_rate) + 2
+        while ms_boundaries(k, self.sample_rate) > frames:
+            k -= 1
+        return k
+
+    def feed(self, block):
+        """Adiciona um bloco de amostras (intercaladas ou no formato frames x canais)"""
+        frames = np.asarray(block).reshape(-1, self.channels)
+        if not len(frames):
+            return np.empty(0, dtype=np.int64)
+
+        # 🔹 int64 é exato para amostras de até 16 bits; acima disso usa float64
+        dtype = np.int64 if frames.dtype.itemsize <= 2 else np.float64
+        squared = frames.astype(dtype)
+        frame_energy = (squared * squared).sum(axis=1)
+        prefix = np.empty(len(frames) + 1, dtype=dtype)
+        prefix[0] = self._total
+        np.cumsum(frame_energy, out=prefix[1:])
+        prefix[1:] += self._total
+
+        start = self.frames_seen
+        end = start + len(frames)
+        last_ms = self._last_closed_ms(end)
+
+        closed = np.empty(0, dtype=np.int64)
+        if last_ms >= self._next_ms:
+            bounds = ms_boundaries(np.arange(self._next_ms, last_ms + 1), self.sample_rate)
+            at_bounds = prefix[bounds - start]
+            closed = np.diff(at_bounds, prepend=self._closed_cum)
+            self._closed_cum = at_bounds[-1].item()
+            self._next_ms = last_ms + 1
+            self._closed_count += len(closed)
+            self.dtype = closed.dtype
+            if self.sink is not None:
+                self.sink.write(closed.tobytes())
+            else:
+                self._parts.append(closed)
+
+        self._total = prefix[-1].item()
+        self.frames_seen = end
+        return closed
+
+    @property
+    def closed_energy(self):
+        """Energia dos milissegundos já fechados"""
+        return np.concatenate(self._parts) if self._parts else np.empty(0, dtype=np.int64)
+
+    @property
+    def pending_energy(self):
+        """Energia dos frames recebidos depois do último limite de ms fechado"""
+        return self._total - self._closed_cum
+
+    def finish(self):
+        """Fecha os milissegundos restantes e devolve o envelope completo"""
+        if self.sink is not None:
+            self.envelope = self._finish_sink()
+        else:
+            self.envelope = assemble_envelope(
+                [self.closed_energy], self.pending_energy, self.sample_rate, self.channels, self.frames_seen
+            )
+        return self.envelope
+
+    def _finish_sink(self):
+        return finish_envelope_file(
+            self.sink,
+            self._closed_count,
+            self.pending_energy,
+            self.dtype,
+            self.sample_rate,
+            self.channels,
+            self.frames_seen,
+        )
+
+
+def finish_envelope_file(sink, written, pending_energy, dtype, sample_rate, channels, n_frames):
+    """Fecha um arquivo de energia como `assemble_envelope` faria e o abre como memmap.
+
+    `written` é a quantidade de ms já gravados em `sink`; o memmap é somente leitura.
+    """
+    dtype = np.dtype(dtype)
+    seg_len = duration_ms(n_frames, sample_rate)
+    if written > seg_len:
+        sink.truncate(seg_len * dtype.itemsize)
+    elif written < seg_len:
+        tail = np.zeros(seg_len - written, dtype=dtype)
+        tail[0] = pending_energy
+        sink.write(tail.tobytes())
+    sink.flush()
+
+    energy = np.empty(0, dtype=dtype)
+    if seg_len:
+        energy = np.memmap(sink.name, dtype=dtype, mode="r", shape=(seg_len,))
+    return Envelope(energy, sample_rate, channels, n_frames)
+
+
+def assemble_envelope(parts, pending_energy, sample_rate, channels, n_frames):
+    """Junta a energia de blocos consecutivos de ms e fecha o final como o pydub faria.
+
+    `parts` são arrays de energia por ms em ordem de timeline (um por bloco analisado) e
+    `pending_energy` é a energia que sobrou depois do último ms fechado do último bloco.
+    """
+    seg_len = duration_ms(n_frames, sample_rate)
+    energy = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    if len(energy) > seg_len:
+        # 🔹 Frames além do último ms inteiro são ignorados, como no pydub
+        energy = energy[:seg_len]
+    elif len(energy) < seg_len:
+        tail = np.zeros(seg_len - len(energy), dtype=energy.dtype)
+        tail[0] = pending_energy
+        energy = np.concatenate((energy, tail))
+
+    return Envelope(energy, sample_rate, channels, n_frames)
+
+
+class Envelope:
+    """Energia por milissegundo de um áudio, suficiente para detectar silêncio em qualquer limiar.
+
+    `energy` pode ser um memmap do cache: a detecção percorre o array em blocos de
+    `BLOCK_MS`, então nenhuma etapa monta arrays do tamanho do áudio inteiro.
+    """
+
+    BLOCK_MS = 1 << 18
+
+    def __init__(self, energy, sample_rate, channels, n_frames, sample_width=2):
+        self.energy = energy
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.n_frames = n_frames
+        self.sample_width = sample_width
+
+    def __len__(self):
+        return len(self.energy)
+
+    @property
+    def max_amplitude(self):
+        return 2 ** (8 * self.sample_width - 1)
+
+    def energy_range(self, start, stop):
+        """Energia dos ms [start, stop) como array comum.
+
+        Com o envelope mapeado do cache o bloco é lido do arquivo em vez de tocar as
+        páginas do memmap, que ficariam contando na memória residente do processo.
+        """
+        stop = min(stop, len(self.energy))
+        if not isinstance(self.energy, np.memmap) or stop <= start:
+            return np.asarray(self.energy[start:stop])
+        dtype = self.energy.dtype
+        offset = self.energy.offset + start * dtype.itemsize
+        return np.fromfile(self.energy.filename, dtype=dtype, count=stop - start, offset=offset)
+
+    def counts_range(self, start, stop):
+        """Quantidade de amostras dos milissegundos [start, stop)"""
+        bounds = ms_boundaries(np.arange(start, stop + 1), self.sample_rate)
+        return np.diff(np.minimum(bounds, self.n_frames)) * self.channels
+
+    def db_blocks(self, window_ms=1):
+        """Nível em dBFS por janela de `window_ms` ms, em blocos consecutivos"""
+        n = len(self.energy) // window_ms * window_ms
+        block = max(window_ms, self.BLOCK_MS // window_ms * window_ms)
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            energy = self.energy_range(start, stop).reshape(-1, window_ms).sum(axis=1)
+            counts = self.counts_range(start, stop).reshape(-1, window_ms).sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rms = np.sqrt(energy / np.maximum(counts, 1))
+                yield 20 * np.log10(rms / self.max_amplitude)
+
+    def detect_silence(self, min_silence_len=1000, silence_thresh=-16):
+        """Trechos silenciosos em ms, com a mesma semântica de `pydub.silence.detect_silence`.
+
+        Uma janela de `min_silence_len` ms que começa em i é silenciosa quando o RMS inteiro
+        dela fica abaixo ou igual a `silence_thresh` (dBFS). Janelas silenciosas que começam
+        a menos de `min_silence_len` ms umas das outras formam um único trecho. As janelas
+        são avaliadas em blocos (cada um com `min_silence_len` ms de sobreposição).
+        """
+        seg_len = len(self.energy)
+        window = min_silence_len
+        if seg_len < window:
+            return []
+        if window <= 0:
+            return [[0, seg_len]]
+
+        limit = amplitude_limit(silence_thresh, self.max_amplitude)
+        grouper = SilenceGrouper(window)
+        ranges = []
+        n_windows = seg_len - window + 1
+        for start in range(0, n_windows, self.BLOCK_MS):
+            stop = min(start + self.BLOCK_MS, n_windows)
+            energy = self.energy_range(start, stop + window - 1)
+            counts = self.counts_range(start, stop + window - 1)
+            starts = silent_window_starts(energy, counts, window, limit) + start
+            ranges += grouper.add(starts, next_start=stop)
+        return ranges + grouper.add(np.empty(0, dtype=np.int64), next_start=math.inf)
+
+
+def amplitude_limit(silence_thresh, max_amplitude=32768):
+    """Menor RMS inteiro acima do limiar: floor(sqrt(soma / n)) <= limiar  <=>  soma < limite² * n"""
+    return math.floor(db_to_float(silence_thresh) * max_amplitude) + 1
+
+
+def silent_window_starts(energy, counts, window, limit):
+    """Índices i em que a janela [i, i + window) de ms é silenciosa"""
+    cum_energy = np.concatenate(([0], np.cumsum(energy, dtype=energy.dtype)))
+    cum_counts = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    window_energy = cum_energy[window:] - cum_energy[:-window]
+    window_counts = cum_counts[window:] - cum_counts[:-window]
+    silent = (window_energy < limit * limit * window_counts) | (window_counts == 0)
+    return np.flatnonzero(silent)
+
+
+class SilenceGrouper:
+    """Junta os inícios de janelas silenciosas, recebidos em ordem, nos trechos de silêncio"""
+
+    def __init__(self, window):
+        self.window = window
+        self.group = None  # [primeiro início, último início] do trecho em aberto
+
+    def add(self, starts, next_start):
+        """Agrupa os novos inícios e devolve os trechos que já não podem crescer.
+
+        `next_start` é a primeira janela ainda não avaliada.
+        """
+        finished = []
+        if len(starts):
+            first_start = starts[0]
+            if self.group is not None:
+                first_start = self.group[0]
+                starts = np.concatenate(([self.group[1]], starts))
+            breaks = np.flatnonzero(np.diff(starts) > self.window)
+            first = np.concatenate((starts[:1], starts[breaks + 1]))
+            last = np.concatenate((starts[breaks], starts[-1:]))
+            first[0] = first_start
+            groups = [[int(s), int(e)] for s, e in zip(first, last)]
+            self.group = groups.pop()
+            finished = [[s, e + self.window] for s, e in groups]
+
+        # 🔹 Nenhuma janela a menos de `window` ms do último início ficou por avaliar
+        if self.group is not None and next_start > self.group[1] + self.window:
+            finished.append([self.group[0], self.group[1] + self.window])
+            self.group = None
+        return finished
+
+
+class StreamingSilenceDetector:
+    """Detecção de silêncio incremental, com o mesmo resultado de `Envelope.detect_silence`.
+
+    Recebe os blocos de PCM em ordem (como um consumidor de `AudioStream.analyze`) e, a
+    cada `feed`, devolve os trechos silenciosos (em ms) que já não podem crescer: os que
+    terminaram há mais de uma janela. Só guarda a energia das janelas ainda não avaliadas.
+    """
+
+    # 🔹 Os últimos ms fechados esperam o fim: o fechamento do envelope pode cortá-los
+    LAG_MS = 2
+
+    def __init__(
+        self, sample_rate, min_silence_len, silence_thresh, channels=1, sample_width=2, accumulator=None
+    ):
+        # 🔹 Um accumulator com `sink` grava o envelope no cache durante a própria detecção
+        self.accumulator = accumulator or EnergyAccumulator(sample_rate, channels)
+        self.window = int(min_silence_len)
+        self.limit = amplitude_limit(silence_thresh, 2 ** (8 * sample_width - 1))
+        self.sample_width = sample_width
+        self.envelope = None
+        self._tail = np.empty(0, dtype=np.int64)  # Energia dos ms a partir de _base
+        self._base = 0  # Primeira janela ainda não avaliada
+        self._grouper = SilenceGrouper(self.window)
+
+    def feed(self, block):
+        closed = self.accumulator.feed(block)
+        if self.window <= 0:
+            return []
+        self._tail = np.concatenate((self._tail, closed))
+        safe = len(self._tail) - self.LAG_MS
+        evaluated = safe - self.window + 1
+        if evaluated <= 0:
+            return []
+
+        bounds = ms_boundaries(np.arange(self._base, self._base + safe + 1), self.accumulator.sample_rate)
+        counts = np.diff(bounds) * self.accumulator.channels
+        starts = silent_window_starts(self._tail[:safe], counts, self.window, self.limit)
+        starts = starts + self._base
+        self._tail = self._tail[evaluated:]
+        self._base += evaluated
+        return self._grouper.add(starts, self._base)
+
+    def finish(self):
+        """Avalia as janelas finais com o envelope fechado e devolve os últimos trechos"""
+        self.envelope = self.accumulator.finish()
+        self.envelope.sample_width = self.sample_width
+        seg_len = len(self.envelope)
+        if seg_len < self.window:
+            return []
+        if self.window <= 0:
+            return [[0, seg_len]]
+
+        starts = np.empty(0, dtype=np.int64)
+        if seg_len - self._base >= self.window:
+            energy = self.envelope.energy_range(self._base, seg_len)
+            counts = self.envelope.counts_range(self._base, seg_len)
+            starts = silent_window_starts(energy, counts, self.window, self.limit)
+            starts = starts + self._base
+        return self._grouper.add(starts, math.inf)
+
+
+def envelope_from_samples(samples, sample_rate, channels=1, sample_width=2, chunk_frames=1 << 20):
+    """Calcula o envelope de um buffer de PCM inteiro, processando em blocos para limitar a memória"""
+    frames = np.asarray(samples).reshape(-1, channels)
+    accumulator = EnergyAccumulator(sample_rate, channels)
+    for start in range(0, len(frames), chunk_frames):
+        accumulator.feed(frames[start:start + chunk_frames])
+    envelope = accumulator.finish()
+    envelope.sample_width = sample_width
+    return envelope
+
+
+def detect_silence(samples, sample_rate, min_silence_len=1000, silence_thresh=-16, channels=1):
+    """Equivalente vetorizado de `pydub.silence.detect_silence` para um array de amostras int16"""
+    envelope = envelope_from_samples(samples, sample_rate, channels=channels)
+    return envelope.detect_silence(min_silence_len, silence_thresh)
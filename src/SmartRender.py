@@ -0,0 +1,185 @@
+import ffmpeg
+import os
+import subprocess
+
+import numpy as np
+
+from Metrics import limit_threads, run_ffmpeg
+
+
+class SmartRender:
+    """Exporta os intervalos mantidos copiando os GOPs inteiros e recodificando só as bordas.
+
+    Cada intervalo vira até três pedaços de vídeo: a cabeça (do corte até o próximo keyframe)
+    e a cauda (do último keyframe até o fim) são recodificadas com os mesmos parâmetros da
+    fonte, e o miolo é copiado byte a byte. O áudio é recodificado em uma passada só e
+    multiplexado no final, já que é barato e evita buracos de priming do AAC nas junções.
+    """
+
+    # Codecs da fonte que sabemos recodificar de forma compatível com a cópia
+    ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+    ANNEXB_BSF = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+
+    def __init__(self, video_path, temp_folder, min_copy_len=1.0, metrics=None, threads=None):
+        self.video_path = video_path
+        self.temp_folder = temp_folder
+        self.metrics = metrics
+        # 🔹 Threads de decoder, filtros e encoder de cada ffmpeg que codifica (None: o ffmpeg
+        # usa todos os núcleos)
+        self.threads = threads
+        # 🔹 Miolos menores que isso não compensam um pedaço extra na concatenação
+        self.min_copy_len = min_copy_len
+        self.stream = None
+        self.keyframes = None
+
+    def probe(self):
+        """Lê os parâmetros do stream de vídeo da fonte"""
+        info = ffmpeg.probe(self.video_path, select_streams="v:0")
+        self.stream = info["streams"][0]
+        return self.stream
+
+    def keyframe_index(self):
+        """Tempos (s) de todos os keyframes do vídeo, lidos em uma única passada do ffprobe"""
+        output = subprocess.check_output(
+            [
+                "ffprobe",
+                "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags",
+                "-of", "csv=p=0",
+                self.video_path,
+            ],
+            text=True,
+        )
+        times = []
+        for line in output.splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                times.append(float(pts_time))
+        self.keyframes = np.unique(np.array(times, dtype=np.float64))
+        return self.keyframes
+
+    def plan(self, kept):
+        """Divide cada intervalo em pedaços ("encode" ou "copy") alinhados aos keyframes"""
+        pieces = []
+        for start, end in kept:
+            first = np.searchsorted(self.keyframes, start, side="left")
+            last = np.searchsorted(self.keyframes, end, side="right") - 1
+
+            if first < len(self.keyframes) and last >= first:
+                copy_start = float(self.keyframes[first])
+                copy_end = float(self.keyframes[last])
+                if copy_end - copy_start >= self.min_copy_len:
+                    if copy_start > start:
+                        pieces.append(("encode", start, copy_start))
+                    pieces.append(("copy", copy_start, copy_end))
+                    if end > copy_end:
+                        pieces.append(("encode", copy_end, end))
+                    continue
+
+            pieces.append(("encode", start, end))
+        return pieces
+
+    def encode_args(self):
+        """Parâmetros de codificação que reproduzem o formato do stream original"""
+        args = {
+            "vcodec": self.ENCODERS[self.stream["codec_name"]],
+            "pix_fmt": self.stream.get("pix_fmt", "yuv420p"),
+            "r": self.stream.get("avg_frame_rate") or self.stream.get("r_frame_rate"),
+            "crf": 16,
+            "preset": "slow",
+        }
+        if self.stream["codec_name"] == "h264" and self.stream.get("profile"):
+            args["profile:v"] = self.stream["profile"].lower().replace(" ", "")
+        return args
+
+    def render_piece(self, idx, kind, start, end):
+        """Gera um pedaço de vídeo (sem áudio) em MPEG-TS para a concatenação por cópia"""
+        piece_path = os.path.join(self.temp_folder, f"smart_{idx}.ts")
+        if kind == "copy":
+            # 🔹 Pequena folga nas duas pontas: o seek não cai no keyframe anterior por
+            # arredondamento, e a cópia para antes do keyframe de `end`, que já é o primeiro
+            # frame da cauda recodificada (senão ele sairia duplicado na junção)
+            source = ffmpeg.input(self.video_path, ss=start + 0.001, t=end - start - 0.002)
+            args = {"vcodec": "copy", "bsf:v": self.ANNEXB_BSF[self.stream["codec_name"]]}
+        else:
+            threads = {"threads": self.threads} if self.threads else {}
+            source = ffmpeg.input(self.video_path, ss=start, t=end - start, **threads)
+            args = dict(self.encode_args(), **threads)
+        run_ffmpeg(
+            limit_threads(
+                source.video.output(piece_path, an=None, format="mpegts", **args), self.threads
+            ),
+            self.metrics,
+            label=f"smart_{kind}_{idx}",
+            expected_duration=end - start,
+        )
+        return piece_path
+
+    def render_audio(self, kept):
+        """Recodifica o áudio dos intervalos mantidos em uma passada"""
+        audio_path = os.path.join(self.temp_folder, "smart_audio.m4a")
+        args = {"threads": self.threads} if self.threads else {}
+        source = ffmpeg.input(self.video_path, **args)
+        parts = [
+            source.audio.filter_("atrim", start=start, end=end).filter_("asetpts", "PTS-STARTPTS")
+            for start, end in kept
+        ]
+        run_ffmpeg(
+            limit_threads(
+                ffmpeg.concat(*parts, v=0, a=1).output(audio_path, acodec="aac", **args),
+                self.threads,
+            ),
+            self.metrics,
+            label="smart_audio",
+        )
+        return audio_path
+
+    def render(self, kept, output_path):
+        """Executa o smart render. Retorna False se a fonte não permitir cópia de GOPs"""
+        if not kept:
+            return False
+
+        self.probe()
+        if self.stream.get("codec_name") not in self.ENCODERS:
+            print(f"⚠️ Smart render não suporta o codec {self.stream.get('codec_name')}.")
+            return False
+
+        self.keyframe_index()
+        if not len(self.keyframes):
+            print("⚠️ Nenhum keyframe encontrado, smart render indisponível.")
+            return False
+
+        os.makedirs(self.temp_folder, exist_ok=True)
+        pieces = self.plan(kept)
+        copied = sum(end - start for kind, start, end in pieces if kind == "copy")
+        total = sum(end - start for _, start, end in pieces)
+        print(f"🔹 Smart render: {copied:.1f}s de {total:.1f}s copiados sem recodificar")
+
+        temp_files = []
+        file_list_path = os.path.join(self.temp_folder, "smart_list.txt")
+        try:
+            for idx, (kind, start, end) in enumerate(pieces):
+                temp_files.append(self.render_piece(idx, kind, start, end))
+            temp_files.append(self.render_audio(kept))
+
+            with open(file_list_path, "w", encoding="utf-8") as f:
+                for piece in temp_files[:-1]:
+                    f.write(f"file '{os.path.abspath(piece)}'\n")
+
+            video = ffmpeg.input(file_list_path, format="concat", safe=0).video
+            audio = ffmpeg.input(temp_files[-1]).audio
+            run_ffmpeg(
+                ffmpeg.output(video, audio, output_path, c="copy"), self.metrics, label="smart_mux"
+            )
+            print(f"✅ Vídeo final gerado com smart render: {output_path}")
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Smart render falhou. Erro: {e}")
+            return False
+
+        finally:
+            for file in temp_files + [file_list_path]:
+                if os.path.exists(file):
+                    os.remove(file)
@@ -1,106 +1,213 @@
-import cv2
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.widgets import Slider, Button
-from pydub import AudioSegment, silence
-import asyncio
 import threading
 import time
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import filedialog
 from ProcessadorVideo import ProcessadorVideo
+from CutList import CutList
+from Calibration import Calibration
+from Intervals import IntervalProcessor
+from MediaCache import MediaCache, SegmentCache
+from FrameServer import FrameServer
+from ProxyMedia import ProxyMedia
 import ttkbootstrap as ttk
 
 
 class VideoPreview:
     """Cria um preview interativo sem timeline, apenas com ajuste de silêncio"""
 
-    def __init__(self, video_path, audio_path, root, voltar_callback, preview_height=100, silence_threshold=-40):
+    def __init__(
+        self,
+        video_path,
+        root,
+        voltar_callback,
+        preview_height=100,
+        silence_threshold=-40,
+        use_proxy=True,
+    ):
         self.video_path = video_path
-        self.audio_path = audio_path
         self.root = root
         self.voltar_callback = voltar_callback  # Callback ao retornar
         self.preview_height = preview_height
         self.silence_threshold = silence_threshold
-        self.cap = cv2.VideoCapture(video_path)
-        self.lock = (
-            threading.Lock()
-        )  # 🔒 Criamos um lock para evitar concorrência no OpenCV
-
-        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS))
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # 🔹 Uma única thread decodifica os frames, com cache e leitura antecipada
+        self.frame_server = FrameServer(video_path, on_frame=self.render_frame)
+
+        # 🔹 Com proxy, o scrubbing lê um H.264 pequeno em vez do original (só o preview)
+        self.proxy = None
+        if use_proxy:
+            self.proxy = ProxyMedia(video_path)
+            if self.proxy.exists():
+                self.frame_server.switch_source(self.proxy.path)
+            else:
+                self.proxy.generate_async(on_ready=self.frame_server.switch_source)
+
+        self.fps = int(self.frame_server.fps)
+        self.total_frames = self.frame_server.total_frames
         self.duration = self.total_frames / self.fps
         self.num_frames = self.total_frames
 
         self.timestamps = np.linspace(0, self.duration, self.total_frames)
         self.current_frame = 1  # 🔥 Agora inicia do frame 1
 
-        # 🔹 Carregamos o áudio extraído
-        self.audio_segment = AudioSegment.from_file(self.audio_path, format="wav")
+        # 🔹 Picos mín/máx em várias resoluções e energia por ms, do cache ou de uma única
+        # leitura do áudio; cada novo limiar ou zoom só percorre esses arrays
+        cache = MediaCache()
+        self.waveform = cache.waveform(self.video_path)
+        self.envelope = cache.envelope(self.video_path)
+        # 🔹 Histograma de volume: limiar sugerido e duração prevista sem detectar de novo
+        self.calibration = Calibration(self.envelope, min_silence_len=700)
+        self.silence_overlay = None
+        self.waveform_lines = None
+
+        # 🔹 Mesmo pós-processamento da exportação (folga, fragmentos curtos, união): a tela
+        # e a duração final do limiar aplicado mostram o que será cortado de fato
+        self.interval_processor = IntervalProcessor()
+        self.audio_duration = self.envelope.n_frames / self.envelope.sample_rate
 
         # 🔹 Detecta partes silenciosas com base no áudio
         self.silent_parts = self.detect_silence(self.silence_threshold)
+        self.removed_parts = self.plan_removed(self.silent_parts)
 
     def detect_silence(self, threshold):
         """Detecta os trechos silenciosos apenas no áudio"""
-        silent_parts = silence.detect_silence(
-            self.audio_segment, min_silence_len=700, silence_thresh=threshold
+        silent_parts = self.envelope.detect_silence(
+            min_silence_len=700, silence_thresh=threshold
         )
         return [(start / 1000, end / 1000) for start, end in silent_parts]
 
-    def get_frame_at(self, time_sec):
-        """Captura um frame do vídeo baseado no tempo em segundos"""
-        with self.lock:  # 🔒 Garantimos que apenas uma thread acessa o OpenCV por vez
-            self.cap.set(cv2.CAP_PROP_POS_MSEC, time_sec * 1000)
-            ret, frame = self.cap.read()
-            if not ret:
-                return np.zeros((360, 640, 3), dtype=np.uint8)
+    def plan_removed(self, silent_parts):
+        """Trechos que a exportação remove: o que sobra fora dos intervalos processados"""
+        kept = CutList(silent_parts, duration=self.audio_duration).kept_intervals()
+        if kept:
+            kept, _ = self.interval_processor.apply(
+                kept, self.audio_duration, self.frame_server.fps
+            )
+        removed = []
+        last_end = 0.0
+        for start, end in kept:
+            if start > last_end:
+                removed.append((last_end, start))
+            last_end = max(last_end, end)
+        if self.audio_duration > last_end:
+            removed.append((last_end, self.audio_duration))
+        return removed
+
+    def cut_list(self):
+        """Lista de cortes do limiar atual, para exportar ou salvar"""
+        return CutList.from_video(
+            self.video_path,
+            self.silent_parts,
+            duration=self.envelope.n_frames / self.envelope.sample_rate,
+            fps=self.frame_server.fps,  # 🔹 Sem truncar: 29.97 vira timecode de 30, não de 29
+            silence_threshold=self.silence_threshold,
+            min_silence_len=700,
+        )
 
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame = cv2.resize(frame, (640, 360))
-            return frame
+    def save_cut_list(self, event):
+        """Salva os cortes atuais como JSON ou EDL (CMX3600)"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Lista de cortes", "*.json"), ("EDL", "*.edl")],
+        )
+        if path:
+            self.cut_list().save(path)
 
     def update_frame(self, slider_value):
-        """Atualiza o frame do vídeo de maneira assíncrona, permitindo que o slider flua livremente"""
+        """Pede o frame ao FrameServer; enquanto o slider é arrastado só o último pedido é atendido"""
         new_frame = int(round(slider_value))
 
         if new_frame == self.current_frame:
             return
 
         self.current_frame = new_frame
-        time_sec = self.timestamps[self.current_frame]
-
-        threading.Thread(
-            target=asyncio.run, args=(self.async_render_frame(time_sec),), daemon=True
-        ).start()
-
-    async def async_render_frame(self, time_sec):
-        """Renderiza o frame de forma assíncrona para evitar travamentos"""
-        await asyncio.sleep(0.03)  # 🔥 Pequeno delay para evitar sobrecarga
-        frame = self.get_frame_at(time_sec)
-        self.video_ax.imshow(frame)
-        self.fig.canvas.flush_events()
+        self.frame_server.request(self.current_frame)
+
+    def render_frame(self, frame_idx, frame):
+        """Mostra o frame decodificado (chamado pela thread do FrameServer)"""
+        if frame_idx != self.current_frame or not hasattr(self, "video_image"):
+            return
+        self.video_image.set_data(frame)
         self.fig.canvas.draw_idle()
 
+    def auto_threshold(self, event):
+        """Aplica o limiar sugerido pelo histograma de volume"""
+        self.silence_slider.set_val(self.calibration.suggested_threshold)
+        self.recalculate_silence(event)
+
+    def show_duration(self, label, duration):
+        total = max(self.audio_duration, 1e-9)
+        minutes, seconds = divmod(int(round(duration)), 60)
+        self.prediction_text.set_text(
+            f"{label}{minutes:02d}:{seconds:02d} (−{100 * (1 - duration / total):.0f}%)"
+        )
+        self.fig.canvas.draw_idle()
+
+    def update_prediction(self, threshold):
+        """Estimativa enquanto o slider é arrastado (busca binária na calibração, sem detecção)"""
+        self.show_duration("Duração prevista: ~", self.calibration.predicted_duration(threshold))
+
+    def show_final_duration(self):
+        """Duração exata do limiar aplicado, já com folga, descarte e união dos intervalos"""
+        removed = sum(end - start for start, end in self.removed_parts)
+        self.show_duration("Duração final: ", self.audio_duration - removed)
+
     def recalculate_silence(self, event):
         """Recalcula os trechos de silêncio e atualiza a barra do slider"""
         self.silence_threshold = int(self.silence_slider.val)
         self.silent_parts = self.detect_silence(self.silence_threshold)
+        self.removed_parts = self.plan_removed(self.silent_parts)
         self.update_silence_visuals()
+        self.show_final_duration()
+
+    def silence_verts(self):
+        """Retângulos (em frames) dos trechos removidos na exportação, no formato do PolyCollection"""
+        parts = np.asarray(self.removed_parts, dtype=np.float64).reshape(-1, 2)
+        x = parts * (self.num_frames / self.duration)
+        bottom, top = np.zeros(len(x)), np.ones(len(x))
+        return np.stack(
+            (
+                np.column_stack((x[:, 0], bottom)),
+                np.column_stack((x[:, 0], top)),
+                np.column_stack((x[:, 1], top)),
+                np.column_stack((x[:, 1], bottom)),
+            ),
+            axis=1,
+        )
 
     def update_silence_visuals(self):
-        """🔴 Adiciona marcações vermelhas sobre o slider indicando trechos silenciosos"""
-        for line in getattr(self, "silence_markers", []):
-            line.remove()
-        self.silence_markers = []
-        for start, end in self.silent_parts:
-            start_idx = int((start / self.duration) * self.num_frames)
-            end_idx = int((end / self.duration) * self.num_frames)
-            line = self.slider_ax.axvspan(
-                start_idx, end_idx, color="#FF3B30", alpha=0.5
+        """🔴 Atualiza as marcações vermelhas dos silêncios sobre o slider.
+
+        Todos os trechos ficam em um único PolyCollection, atualizado no lugar: o custo
+        do redesenho não cresce com um artista por silêncio.
+        """
+        verts = self.silence_verts()
+        if self.silence_overlay is None:
+            self.silence_overlay = PolyCollection(
+                verts, facecolors="#FF3B30", edgecolors="none", alpha=0.5, zorder=3
             )
-            self.silence_markers.append(line)
+            self.slider_ax.add_collection(self.silence_overlay, autolim=False)
+        else:
+            self.silence_overlay.set_verts(verts)
+        self.fig.canvas.draw_idle()
+
+    def draw_waveform(self, *args):
+        """Desenha a forma de onda da parte visível do slider, uma coluna por pixel"""
+        x0, x1 = self.slider_ax.get_xlim()
+        width = max(1, int(self.slider_ax.bbox.width))
+        scale = self.num_frames / self.duration  # segundos → frames (eixo do slider)
+        segments = self.waveform.segments(x0 / scale, x1 / scale, width, x_scale=scale)
+        if self.waveform_lines is None:
+            self.waveform_lines = LineCollection(
+                segments, colors="#D3D3D3", linewidths=1, alpha=0.6, zorder=2
+            )
+            self.slider_ax.add_collection(self.waveform_lines, autolim=False)
+        else:
+            self.waveform_lines.set_segments(segments)
         self.fig.canvas.draw_idle()
 
     def generate_preview(self):
@@ -113,8 +220,8 @@ class VideoPreview:
         self.fig, self.video_ax = plt.subplots(figsize=(10, 6), facecolor="#1E1E1E")
         #self.fig.canvas.manager.full_screen_toggle()
         self.video_ax.axis("off")
-        self.video_ax.imshow(
-            self.get_frame_at(self.timestamps[1])
+        self.video_image = self.video_ax.imshow(
+            self.frame_server.get_frame(1)
         )  # 🔥 Inicia do frame 1
 
         # 🔹 Slider de Tempo (🔥 estilizado)
@@ -135,6 +242,14 @@ class VideoPreview:
         self.export_button = Button(export_button_ax, "Exportar Vídeo")
         self.export_button.label.set_color("#333333")
         self.export_button.on_clicked(self.export_video)
+
+        # 🔹 Botão Salvar cortes (JSON/EDL para exportar depois ou em outra máquina)
+        cut_list_button_ax = self.fig.add_axes(
+            [0.65, 0.01, 0.15, 0.04], facecolor="#444444"
+        )
+        self.cut_list_button = Button(cut_list_button_ax, "Salvar Cortes")
+        self.cut_list_button.label.set_color("#333333")
+        self.cut_list_button.on_clicked(self.save_cut_list)
         
         # 🔹 Slider de Sensibilidade do Silêncio (🔥 iPhone-style, movido um pouco para cima)
         silence_slider_ax = self.fig.add_axes(
@@ -157,6 +272,17 @@ class VideoPreview:
         self.recalculate_button = Button(button_ax, "Aplicar Sensibilidade")
         self.recalculate_button.label.set_color("#333333")
         self.recalculate_button.on_clicked(self.recalculate_silence)    
+
+        # 🔹 Botão Auto: limiar sugerido pela calibração (ruído de fundo x fala)
+        auto_button_ax = self.fig.add_axes([0.62, 0.88, 0.08, 0.04], facecolor="#444444")
+        self.auto_button = Button(auto_button_ax, "Auto")
+        self.auto_button.label.set_color("#333333")
+        self.auto_button.on_clicked(self.auto_threshold)
+
+        # 🔹 Duração prevista, atualizada enquanto o slider de sensibilidade é arrastado
+        self.prediction_text = self.fig.text(0.72, 0.895, "", color="#D3D3D3", fontsize=9)
+        self.silence_slider.on_changed(self.update_prediction)
+        self.show_final_duration()
         
         # 🔹 Botão de Voltar (canto superior esquerdo)
         back_button_ax = self.fig.add_axes([0.02, 0.92, 0.05, 0.05], facecolor="#444444")
@@ -165,6 +291,11 @@ class VideoPreview:
         self.back_button.on_clicked(self.voltar_tela_inicial)
 
 
+        # 🔹 Forma de onda no slider, redesenhada a partir da pirâmide no zoom/redimensionamento
+        self.draw_waveform()
+        self.slider_ax.callbacks.connect("xlim_changed", self.draw_waveform)
+        self.fig.canvas.mpl_connect("resize_event", self.draw_waveform)
+
         self.update_silence_visuals()
         plt.show()
 
@@ -180,13 +311,54 @@ class VideoPreview:
             loading_window.title("Processando...")
             loading_window.geometry("300x100")
             loading_label = tk.Label(loading_window, text="🔄 Processando vídeo, aguarde...")
+            loading_label.pack(pady=10)
+            progress_bar = ttk.Progressbar(loading_window, maximum=100, length=260)
+            progress_bar.pack(pady=5)
             loading_window.resizable(False, False)
             loading_window.grab_set()
             loading_window.transient(self.fig.canvas.manager.window)
 
+            stage_names = {
+                "detect_silence": "🔎 Analisando o áudio...",
+                "smart_render": "✂️ Copiando trechos (smart render)...",
+                "single_pass": "🎬 Codificando o vídeo...",
+                "cut_video": "🎬 Codificando os trechos...",
+                "concatenate_videos": "🔗 Juntando os trechos...",
+            }
+
+            def on_metrics(event):
+                """Traduz os eventos do PipelineMetrics em texto e barra de progresso"""
+                text, value = None, None
+                if event["event"] == "stage_start":
+                    text, value = stage_names.get(event["stage"]), 0
+                elif event["event"] == "progress" and "fraction" in event and event["label"] == "single_pass":
+                    value = 100 * event["fraction"]
+                elif event["event"] == "segment_end":
+                    value = 100 * event["done"] / event["total"]
+
+                def apply():
+                    if text:
+                        loading_label.config(text=text)
+                    if value is not None:
+                        progress_bar["value"] = value
+
+                loading_window.after(0, apply)
+
             def process():
                 try:
-                    processador = ProcessadorVideo(self.video_path, self.silence_threshold, output_path)
+                    # 🔹 No preview o usuário reexporta após pequenos ajustes: por segmentos com
+                    # cache, só os intervalos que mudaram são codificados de novo
+                    processador = ProcessadorVideo(
+                        self.video_path,
+                        self.silence_threshold,
+                        output_path,
+                        export_mode="segments",
+                        segment_cache=SegmentCache(),
+                        # 🔹 Os silêncios já estão na tela: a exportação não reanalisa o áudio
+                        cut_list=self.cut_list(),
+                        interval_processor=self.interval_processor,
+                    )
+                    processador.metrics.subscribe(on_metrics)
                     processador.remove_silence()
                     loading_window.destroy()
                     tk.messagebox.showinfo("Sucesso", "Vídeo exportado com sucesso!")
@@ -196,14 +368,11 @@ class VideoPreview:
 
             threading.Thread(target=process, daemon=True).start()
             
-        def __del__(self):
-            """Libera os recursos corretamente ao fechar a aplicação"""
-            if self.cap.isOpened():
-                self.cap.release()
-
-
-
     def voltar_tela_inicial(self, event):
         import matplotlib.pyplot as plt
         plt.close(self.fig)
+        # 🔹 O proxy ainda em geração não serve mais: para o ffmpeg antes de fechar a fonte
+        if self.proxy is not None:
+            self.proxy.cancel()
+        self.frame_server.close()
         self.voltar_callback()  # 🔥 Reativa o frame original
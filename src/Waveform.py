@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class PeakAccumulator:
+    """Mínimo e máximo de cada bloco de `bucket_ms` ms, calculados durante a leitura do áudio.
+
+    É um consumidor de `AudioStream.analyze` (método `feed`), então a forma de onda sai da
+    mesma passada que o envelope de energia. Blocos de 10 ms bastam para a tela (um pixel
+    raramente passa de alguns ms) e deixam o nível fino 10 vezes menor que o envelope.
+    """
+
+    def __init__(self, sample_rate, bucket_ms=10):
+        self.sample_rate = sample_rate
+        self.bucket_frames = max(1, sample_rate * bucket_ms // 1000)
+        self._leftover = np.empty(0, dtype=np.int16)
+        self._mins = []
+        self._maxs = []
+
+    def feed(self, block):
+        samples = np.concatenate((self._leftover, np.asarray(block).reshape(-1)))
+        usable = len(samples) - len(samples) % self.bucket_frames
+        buckets = samples[:usable].reshape(-1, self.bucket_frames)
+        self._leftover = samples[usable:]
+        if len(buckets):
+            self._mins.append(buckets.min(axis=1))
+            self._maxs.append(buckets.max(axis=1))
+
+    def finish(self):
+        """Fecha o último bloco incompleto e monta a pirâmide"""
+        if len(self._leftover):
+            self._mins.append(self._leftover.min(keepdims=True))
+            self._maxs.append(self._leftover.max(keepdims=True))
+            self._leftover = self._leftover[:0]
+        mins = np.concatenate(self._mins) if self._mins else np.zeros(0, dtype=np.int16)
+        maxs = np.concatenate(self._maxs) if self._maxs else np.zeros(0, dtype=np.int16)
+        return PeakPyramid(mins, maxs, self.bucket_frames / self.sample_rate)
+
+
+class PeakPyramid:
+    """Picos mínimo/máximo do áudio em várias resoluções, para desenhar em qualquer zoom.
+
+    O nível 0 tem um par (mín, máx) por bloco de `bucket_seconds`; cada nível seguinte
+    junta `factor` blocos do anterior. Desenhar um trecho escolhe o nível mais grosso que
+    ainda tem pelo menos um bloco por pixel, então o custo depende da largura da tela e
+    não da duração do vídeo.
+    """
+
+    def __init__(self, mins, maxs, bucket_seconds, factor=4):
+        self.bucket_seconds = bucket_seconds
+        self.factor = factor
+        self.levels = [(np.asarray(mins), np.asarray(maxs))]
+        while len(self.levels[-1][0]) > factor:
+            mins, maxs = self.levels[-1]
+            n = len(mins) // factor * factor
+            # 🔹 O resto que não completa um grupo vira um bloco a mais no fim
+            coarse_min = mins[:n].reshape(-1, factor).min(axis=1)
+            coarse_max = maxs[:n].reshape(-1, factor).max(axis=1)
+            if n < len(mins):
+                coarse_min = np.append(coarse_min, mins[n:].min())
+                coarse_max = np.append(coarse_max, maxs[n:].max())
+            self.levels.append((coarse_min, coarse_max))
+
+    def peaks(self, t0, t1, width):
+        """(tempos, mínimos, máximos) do intervalo [t0, t1] s com cerca de `width` colunas"""
+        span = max(t1 - t0, self.bucket_seconds)
+        level = 0
+        while (
+            level + 1 < len(self.levels)
+            and span / (self.bucket_seconds * self.factor ** (level + 1)) >= width
+        ):
+            level += 1
+
+        mins, maxs = self.levels[level]
+        step = self.bucket_seconds * self.factor**level
+        first = max(0, int(t0 / step))
+        last = min(len(mins), int(np.ceil(t1 / step)))
+        times = (np.arange(first, last) + 0.5) * step
+        return times, mins[first:last], maxs[first:last]
+
+    def segments(self, t0, t1, width, x_scale=1.0, amplitude=32768.0, center=0.5, height=0.5):
+        """Segmentos verticais (mín → máx) prontos para um LineCollection"""
+        times, mins, maxs = self.peaks(t0, t1, width)
+        x = times * x_scale
+        y_min = center + height * mins / amplitude
+        y_max = center + height * maxs / amplitude
+        return np.stack(
+            (np.column_stack((x, y_min)), np.column_stack((x, y_max))), axis=1
+        )
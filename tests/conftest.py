@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 🔹 Os módulos ficam soltos em src/ (importados pelo nome, como nos scripts)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,107 @@
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pytest
+
+import AudioStream as audio_stream_module
+from AudioStream import AudioStream
+
+SAMPLE_RATE = 16000
+SECONDS = 23
+WARMUP = SAMPLE_RATE // 5  # 200 ms "frios" depois de cada seek
+
+
+def synthetic_signal():
+    rng = np.random.default_rng(0)
+    envelope = np.repeat(rng.choice([0, 50, 3000, 15000], size=SECONDS * 10), SAMPLE_RATE // 10)
+    return (rng.standard_normal(len(envelope)) * envelope).clip(-32768, 32767).astype(np.int16)
+
+
+SIGNAL = synthetic_signal()
+
+
+def fake_chunks(self):
+    """Imita o ffmpeg: depois de um -ss as primeiras amostras saem diferentes da leitura única"""
+    first = int((self.start or 0) * self.sample_rate)
+    last = len(SIGNAL) if self.duration is None else first + int(self.duration * self.sample_rate)
+    samples = SIGNAL[first:last].copy()
+    if first:
+        samples[:WARMUP] //= 3
+    for start in range(0, len(samples), 4096):
+        yield samples[start:start + 4096]
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    monkeypatch.setattr(AudioStream, "chunks", fake_chunks)
+    # 🔹 Threads em vez de processos: o patch vale para os workers
+    monkeypatch.setattr(audio_stream_module, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+
+def test_parallel_envelope_matches_single_pass(fake_ffmpeg):
+    stream = AudioStream("fake.mp4", SAMPLE_RATE)
+    single = stream.envelope()
+    parallel = stream.envelope_parallel(SECONDS, workers=3, chunk_seconds=5)
+
+    assert parallel.n_frames == single.n_frames
+    np.testing.assert_array_equal(parallel.energy, single.energy)
+
+
+def test_cold_chunks_differ_without_preroll(fake_ffmpeg):
+    """Sem o preroll o aquecimento entra na análise (garante que o teste acima mede algo)"""
+    stream = AudioStream("fake.mp4", SAMPLE_RATE)
+    single = stream.envelope()
+    cold = stream.envelope_parallel(SECONDS, workers=3, chunk_seconds=5, preroll=0)
+    assert not np.array_equal(cold.energy, single.energy)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg não instalado")
+def test_parallel_envelope_matches_single_pass_with_ffmpeg(tmp_path):
+    media_path = str(tmp_path / "tone.m4a")
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-v", "error", "-y",
+            "-f", "lavfi", "-i", "aevalsrc=0.5*sin(2*PI*440*t)*lt(mod(t\\,5.5)\\,4):s=48000:d=23",
+            "-c:a", "aac",
+            media_path,
+        ],
+        check=True,
+    )
+    stream = AudioStream(media_path)
+    single = stream.envelope()
+    parallel = stream.envelope_parallel(23, workers=3, chunk_seconds=5)
+
+    assert parallel.n_frames == single.n_frames
+    np.testing.assert_array_equal(parallel.energy, single.energy)
+
+
+def test_parallel_envelope_streams_into_sink(fake_ffmpeg, tmp_path):
+    stream = AudioStream("fake.mp4", SAMPLE_RATE)
+    single = stream.envelope()
+    with open(tmp_path / "energy.bin", "wb") as sink:
+        parallel = stream.envelope_parallel(SECONDS, workers=2, chunk_seconds=3, sink=sink)
+
+    # 🔹 O resultado é o próprio arquivo mapeado, não uma cópia montada na memória
+    assert isinstance(parallel.energy, np.memmap)
+    assert parallel.n_frames == single.n_frames
+    np.testing.assert_array_equal(parallel.energy, single.energy)
+
+
+def test_incomplete_chunk_falls_back_to_single_pass_in_sink(fake_ffmpeg, monkeypatch, tmp_path):
+    def short_chunks(self):
+        chunks = fake_chunks(self)
+        if self.start == 9:  # Bloco de 10 s lido com 1 s de preroll: volta curto
+            chunks = islice(chunks, 3)
+        yield from chunks
+
+    monkeypatch.setattr(AudioStream, "chunks", short_chunks)
+    stream = AudioStream("fake.mp4", SAMPLE_RATE)
+    single = stream.envelope()
+    with open(tmp_path / "energy.bin", "wb") as sink:
+        parallel = stream.envelope_parallel(SECONDS, workers=2, chunk_seconds=5, sink=sink)
+
+    assert isinstance(parallel.energy, np.memmap)
+    np.testing.assert_array_equal(parallel.energy, single.energy)
@@ -0,0 +1,28 @@
+import os
+
+from ExportJob import ExportJob
+from GapRemovalCLI import find_videos, output_path_for
+
+
+def touch(path):
+    with open(path, "wb") as f:
+        f.write(b"\0")
+    return str(path)
+
+
+def test_partial_output_is_hidden_next_to_destination(tmp_path):
+    job = ExportJob(touch(tmp_path / "aula.mp4"), str(tmp_path / "aula_sem_silencio.mp4"), -40)
+    folder, name = os.path.split(job.partial_path)
+    assert folder == str(tmp_path)
+    assert name == ".aula_sem_silencio.partial.mp4"
+
+
+def test_resumed_batch_ignores_partial_outputs(tmp_path):
+    """Depois de uma queda o lote é refeito na mesma pasta: a saída pela metade não é fonte"""
+    source = touch(tmp_path / "aula.mp4")
+    job = ExportJob(source, output_path_for(source, None, "_sem_silencio"), -40)
+    touch(job.partial_path)
+    touch(tmp_path / "aula_sem_silencio.partial.mp4")  # Nome usado por versões anteriores
+
+    assert find_videos([str(tmp_path)]) == [source]
+    assert find_videos([job.partial_path]) == []
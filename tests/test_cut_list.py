@@ -0,0 +1,57 @@
+import pytest
+
+from CutList import CutList
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "source.mp4"
+    path.write_bytes(b"\0" * 4096)
+    return str(path)
+
+
+@pytest.mark.parametrize("fps", (24, 25, 30000 / 1001, 24000 / 1001, 30, 50))
+def test_edl_round_trip_keeps_frame_rate(tmp_path, video, fps):
+    silences = [(10.0, 12.96), (20.0, 21.5), (3600.0, 3601.5), (7000.0, 7002.0)]
+    cut_list = CutList.from_video(video, silences, duration=7200.0, fps=fps)
+    path = str(tmp_path / "cuts.edl")
+    cut_list.save(path)
+
+    # 🔹 Sem passar fps: a leitura usa o frame rate exato gravado na própria EDL
+    loaded = CutList.load(path)
+    assert loaded.fps == pytest.approx(fps, rel=1e-12)
+    flat = [edge for part in loaded.silent_parts for edge in part]
+    expected = [edge for part in silences for edge in part]
+    # Só a quantização em frames, sem deriva ao longo de horas
+    assert flat == pytest.approx(expected, abs=0.5 / fps + 1e-9)
+    assert loaded.matches(video)
+
+
+def test_ntsc_timecode_counts_real_frames(tmp_path):
+    """1 h de fonte a 29.97 são 107892 frames: 00:59:56:12 em timecode NON-DROP de base 30"""
+    cut_list = CutList([(3600.0, 3601.0)], duration=3700.0, fps=30000 / 1001)
+    path = tmp_path / "ntsc.edl"
+    cut_list.save_edl(str(path))
+    text = path.read_text(encoding="utf-8")
+    assert "* FPS: 30000/1001" in text
+    assert "00:00:00:00 00:59:56:12" in text
+
+
+def test_edl_without_fps_comment_uses_argument(tmp_path):
+    path = tmp_path / "foreign.edl"
+    path.write_text(
+        "TITLE: Outro\nFCM: NON-DROP FRAME\n\n"
+        "001  AX       AA/V  C        00:00:00:00 00:00:10:00 00:00:00:00 00:00:10:00\n"
+        "002  AX       AA/V  C        00:00:12:12 00:00:20:00 00:00:10:00 00:00:17:13\n",
+        encoding="utf-8",
+    )
+    assert CutList.load(str(path), fps=24).silent_parts == [(10.0, 12.5)]
+    assert CutList.load(str(path)).silent_parts == [(10.0, 12.4)]
+
+
+def test_json_round_trip(tmp_path, video):
+    cut_list = CutList.from_video(video, [(1.234, 2.5)], duration=8.0, fps=25, min_silence_len=700)
+    path = str(tmp_path / "cuts.cutlist.json")
+    cut_list.save(path)
+    loaded = CutList.load(path)
+    assert loaded.to_dict() == cut_list.to_dict()
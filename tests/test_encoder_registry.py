@@ -0,0 +1,81 @@
+import json
+
+from EncoderRegistry import FALLBACK, EncoderRegistry, EncoderSession
+
+ENCODERS = """Encoders:
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ V....D h264_qsv             H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (Intel Quick Sync Video acceleration)
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)
+"""
+
+
+class FakeFFmpeg:
+    """Responde como o ffmpeg: só os encoders de `working` passam na codificação de teste"""
+
+    def __init__(self, working, version="ffmpeg version 6.1"):
+        self.working = set(working)
+        self.version = version
+        self.probes = []
+
+    def __call__(self, args, timeout=30):
+        if "-version" in args:
+            return 0, f"{self.version} Copyright (c) the FFmpeg developers\n"
+        if "-encoders" in args:
+            return 0, ENCODERS
+        codec = args[args.index("-c:v") + 1]
+        self.probes.append(codec)
+        if codec in self.working:
+            return 0, ""
+        return 1, "Cannot load libcuda.so.1"
+
+
+def registry(tmp_path, runner, **kwargs):
+    return EncoderRegistry(runner, cache_path=str(tmp_path / "encoders.json"), **kwargs)
+
+
+def test_listed_encoder_that_fails_probe_is_excluded(tmp_path):
+    runner = FakeFFmpeg(working={"h264_qsv"})
+    assert registry(tmp_path, runner).available() == ["h264_qsv", FALLBACK]
+    assert runner.probes == ["h264_nvenc", "h264_qsv"]
+
+
+def test_probe_results_are_reused_from_disk(tmp_path):
+    registry(tmp_path, FakeFFmpeg(working={"h264_nvenc"})).available()
+
+    runner = FakeFFmpeg(working={"h264_nvenc"})
+    assert registry(tmp_path, runner).available() == ["h264_nvenc", FALLBACK]
+    assert runner.probes == []
+
+
+def test_cache_is_invalidated_when_ffmpeg_changes(tmp_path):
+    registry(tmp_path, FakeFFmpeg(working={"h264_nvenc"})).available()
+
+    runner = FakeFFmpeg(working=set(), version="ffmpeg version 7.0")
+    assert registry(tmp_path, runner).available() == [FALLBACK]
+    assert runner.probes == ["h264_nvenc", "h264_qsv"]
+
+
+def test_cache_expires_after_max_age(tmp_path):
+    registry(tmp_path, FakeFFmpeg(working={"h264_nvenc"})).available()
+    cache_path = tmp_path / "encoders.json"
+    data = json.loads(cache_path.read_text())
+    data["checked_at"] -= 2 * 3600
+    cache_path.write_text(json.dumps(data))
+
+    runner = FakeFFmpeg(working={"h264_nvenc"})
+    assert registry(tmp_path, runner, max_age=3600).available() == ["h264_nvenc", FALLBACK]
+    assert runner.probes == ["h264_nvenc", "h264_qsv"]
+
+
+def test_session_switches_to_fallback_once(capsys):
+    session = EncoderSession("h264_nvenc")
+    assert session.candidates() == ["h264_nvenc", FALLBACK]
+
+    session.report_failure("h264_nvenc", "driver")
+    session.report_failure("h264_nvenc", "driver")  # Outro trecho que já estava em andamento
+    session.report_failure(FALLBACK, "disco cheio")
+
+    assert session.video == FALLBACK
+    assert session.preferred == "h264_nvenc"
+    assert session.candidates() == [FALLBACK]
+    assert capsys.readouterr().out.count("🔄") == 1
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("resource")  # ru_maxrss só existe em sistemas POSIX
+
+HOURS = 3
+# 🔹 O envelope de 3 h sozinho tem ~86 MB (int64 por ms): passar do limite indica que ele
+# (ou o áudio) voltou a ficar inteiro na memória
+RSS_LIMIT_MB = 120
+
+PROBE = textwrap.dedent(
+    """
+    import json, os, resource, sys, tempfile
+    import numpy as np
+
+    sys.path.insert(0, {src!r})
+    from Calibration import Calibration
+    from MediaCache import MediaCache
+    from SilenceDetector import StreamingSilenceDetector
+
+    SAMPLE_RATE = 16000
+    hours = {hours}
+
+    def synthetic_chunks():
+        # 4 s de tom + 1,5 s de silêncio, como o padrão do Benchmark, em blocos de 4096 amostras
+        t = np.arange(int(SAMPLE_RATE * 5.5)) / SAMPLE_RATE
+        period = (np.sin(2 * np.pi * 440 * t) * 16000 * (t < 4)).astype(np.int16)
+        for _ in range(int(hours * 3600 / 5.5)):
+            for start in range(0, len(period), 4096):
+                yield period[start:start + 4096]
+
+    work = tempfile.mkdtemp()
+    video_path = os.path.join(work, "source.mp4")
+    open(video_path, "wb").close()
+    cache = MediaCache(os.path.join(work, "cache"))
+
+    found = 0
+    with cache.envelope_writer(video_path, SAMPLE_RATE) as accumulator:
+        detector = StreamingSilenceDetector(SAMPLE_RATE, 700, -40, accumulator=accumulator)
+        for chunk in synthetic_chunks():
+            found += len(detector.feed(chunk))
+        found += len(detector.finish())
+
+    envelope = cache.load_envelope(video_path, SAMPLE_RATE)
+    Calibration(envelope, 700).table()
+    silent_parts = envelope.detect_silence(700, -40)
+    print(json.dumps({{
+        "memmap": type(envelope.energy).__name__,
+        "duration_s": len(envelope) / 1000,
+        "streamed": found,
+        "silences": len(silent_parts),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }}))
+    """
+)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="ru_maxrss em KB só no Linux")
+def test_peak_rss_is_flat_for_multi_hour_source():
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(src=src, hours=HOURS)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    expected = int(HOURS * 3600 / 5.5)
+    assert result["memmap"] == "memmap"
+    assert result["duration_s"] == expected * 5.5
+    assert result["streamed"] == result["silences"] == expected
+    assert result["peak_rss_mb"] < RSS_LIMIT_MB, result
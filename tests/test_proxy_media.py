@@ -0,0 +1,61 @@
+import os
+import threading
+
+import ffmpeg
+
+from MediaCache import MediaCache
+from ProxyMedia import ProxyMedia
+
+
+class HangingProcess:
+    """Processo do ffmpeg que só termina quando é morto"""
+
+    def __init__(self, temp_path):
+        self.started = threading.Event()
+        self.killed = threading.Event()
+        self.returncode = None
+        with open(temp_path, "wb") as f:
+            f.write(b"\0")
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+        self.killed.set()
+
+    def communicate(self):
+        self.started.set()
+        self.killed.wait(timeout=5)
+        return b"", b""
+
+
+def test_cancel_stops_generation_and_skips_on_ready(tmp_path, monkeypatch):
+    video_path = tmp_path / "aula.mp4"
+    video_path.write_bytes(b"\0")
+    proxy = ProxyMedia(str(video_path), cache=MediaCache(str(tmp_path / "cache")))
+    temp_path = proxy.cache.path(proxy.key, ".tmp.mkv")
+    processes = []
+    spawned = threading.Event()
+
+    def run_async(stream, **kwargs):
+        processes.append(HangingProcess(temp_path))
+        spawned.set()
+        return processes[-1]
+
+    monkeypatch.setattr(ffmpeg.nodes.OutputStream, "run_async", run_async)
+    ready = []
+    thread = proxy.generate_async(on_ready=ready.append)
+    assert spawned.wait(timeout=5)
+    processes[0].started.wait(timeout=5)
+
+    proxy.cancel()
+    thread.join(timeout=5)
+
+    assert processes[0].killed.is_set()
+    assert ready == []
+    assert not os.path.exists(temp_path)
+    assert not proxy.exists()
+    # 🔹 Depois de cancelado, nenhuma nova transcodificação começa
+    assert proxy.generate() is None
+    assert len(processes) == 1
@@ -0,0 +1,87 @@
+import warnings
+
+import numpy as np
+import pytest
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")  # pydub avisa quando o ffmpeg não está no PATH
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence as pydub_detect_silence
+
+from SilenceDetector import StreamingSilenceDetector, detect_silence
+
+
+def generated_signal(rng, sample_rate, channels, seconds):
+    """Trechos de silêncio, ruído baixo e fala alta com durações aleatórias (int16)"""
+    n_frames = int(sample_rate * seconds)
+    frames = np.zeros((n_frames, channels), dtype=np.int16)
+    pos = 0
+    while pos < n_frames:
+        length = min(int(rng.integers(1, sample_rate)), n_frames - pos)
+        amplitude = int(rng.choice([0, 20, 150, 1200, 12000]))
+        frames[pos:pos + length] = rng.integers(
+            -amplitude - 1, amplitude + 1, size=(length, channels)
+        )
+        pos += length
+    return frames
+
+
+def pydub_reference(frames, sample_rate, min_silence_len, silence_thresh):
+    segment = AudioSegment(
+        data=frames.tobytes(), sample_width=2, frame_rate=sample_rate, channels=frames.shape[1]
+    )
+    return pydub_detect_silence(segment, min_silence_len, silence_thresh)
+
+
+def streamed(frames, sample_rate, min_silence_len, silence_thresh, rng):
+    """Mesmo sinal entregue ao detector incremental em blocos de tamanho aleatório"""
+    detector = StreamingSilenceDetector(
+        sample_rate, min_silence_len, silence_thresh, channels=frames.shape[1]
+    )
+    ranges = []
+    pos = 0
+    while pos < len(frames):
+        size = int(rng.integers(1, sample_rate // 2))
+        ranges += detector.feed(frames[pos:pos + size])
+        pos += size
+    return ranges + detector.finish()
+
+
+CASES = [
+    (sample_rate, channels, min_silence_len, silence_thresh)
+    for sample_rate in (8000, 16000, 44100)
+    for channels in (1, 2)
+    for min_silence_len, silence_thresh in ((100, -50), (300, -40), (700, -30.5))
+]
+
+
+@pytest.mark.parametrize("sample_rate, channels, min_silence_len, silence_thresh", CASES)
+def test_matches_pydub(sample_rate, channels, min_silence_len, silence_thresh):
+    rng = np.random.default_rng([sample_rate, channels, min_silence_len])
+    for _ in range(3):
+        frames = generated_signal(rng, sample_rate, channels, seconds=rng.uniform(0.5, 3))
+        expected = pydub_reference(frames, sample_rate, min_silence_len, silence_thresh)
+
+        got = detect_silence(
+            frames.reshape(-1), sample_rate, min_silence_len, silence_thresh, channels=channels
+        )
+        assert got == expected
+        assert streamed(frames, sample_rate, min_silence_len, silence_thresh, rng) == expected
+
+
+@pytest.mark.parametrize("min_silence_len", (0, 50, 5000))
+def test_edge_windows_match_pydub(min_silence_len):
+    """Janela nula, menor que um bloco e maior que o áudio inteiro"""
+    rng = np.random.default_rng(min_silence_len)
+    frames = generated_signal(rng, 16000, 1, seconds=2)
+    expected = pydub_reference(frames, 16000, min_silence_len, -40)
+    assert detect_silence(frames.reshape(-1), 16000, min_silence_len, -40) == expected
+    assert streamed(frames, 16000, min_silence_len, -40, rng) == expected
+
+
+def test_all_silent_and_all_loud():
+    silent = np.zeros((16000, 1), dtype=np.int16)
+    loud = np.full((16000, 1), 20000, dtype=np.int16)
+    for frames in (silent, loud):
+        expected = pydub_reference(frames, 16000, 300, -40)
+        assert detect_silence(frames.reshape(-1), 16000, 300, -40) == expected
@@ -0,0 +1,78 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from EncoderRegistry import EncoderSession
+from ProcessadorVideo import ProcessadorVideo
+from SmartRender import SmartRender
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="ffmpeg/ffprobe não instalados",
+)
+
+FPS = 30
+# 🔹 Limites em frames inteiros, fora dos keyframes (1 por segundo): cada intervalo tem
+# cabeça recodificada, miolo copiado e cauda recodificada
+KEPT = [(0.5, 3.5), (4.2, 7.8), (8.5, 11.0)]
+SILENT = [(0.0, 0.5), (3.5, 4.2), (7.8, 8.5), (11.0, 12.0)]
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("smart") / "source.mp4")
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-v", "error", "-y",
+            "-f", "lavfi", "-i", f"testsrc2=size=320x240:rate={FPS}:duration=12",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000:duration=12",
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            "-g", str(FPS), "-keyint_min", str(FPS), "-sc_threshold", "0",
+            "-c:a", "aac", "-shortest",
+            path,
+        ],
+        check=True,
+    )
+    return path
+
+
+def probe(path):
+    """(frames de vídeo, duração do vídeo em s)"""
+    output = subprocess.check_output(
+        [
+            "ffprobe", "-v", "error", "-count_packets", "-select_streams", "v:0",
+            "-show_entries", "stream=nb_read_packets,duration", "-of", "json", path,
+        ],
+        text=True,
+    )
+    stream = json.loads(output)["streams"][0]
+    return int(stream["nb_read_packets"]), float(stream["duration"])
+
+
+def test_smart_render_matches_segments(source, tmp_path):
+    smart_path = str(tmp_path / "smart.mp4")
+    assert SmartRender(source, str(tmp_path / "smart_parts")).render(KEPT, smart_path)
+
+    segments_path = str(tmp_path / "segments.mp4")
+    processador = ProcessadorVideo(
+        source,
+        -40,
+        segments_path,
+        export_mode="segments",
+        temp_folder=str(tmp_path / "segment_parts"),
+        encoder=EncoderSession("libx264"),
+        interval_processor=False,
+    )
+    cut_files = processador.cut_video(SILENT, KEPT)
+    processador.concatenate_videos(cut_files, stream_copy=len(processador.segment_codecs) == 1)
+
+    expected_frames = sum(round((end - start) * FPS) for start, end in KEPT)
+    smart_frames, smart_duration = probe(smart_path)
+    segments_frames, segments_duration = probe(segments_path)
+
+    # Um keyframe de borda copiado e recodificado daria um frame a mais por intervalo
+    assert smart_frames == expected_frames
+    assert abs(smart_frames - segments_frames) <= 1
+    assert smart_duration == pytest.approx(segments_duration, abs=2 / FPS)